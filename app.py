@@ -1,21 +1,47 @@
-from flask import Flask, render_template, redirect
+from flask import Flask, Response, render_template, redirect, request, make_response
 from flask_admin import Admin
 from flask_admin.contrib.sqla import ModelView
 from flask.cli import with_appcontext
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from helpers.benchmark_helper import (
+    benchmark_brackets,
+    benchmark_writes,
+    explain_queries,
+)
+from helpers.cache_helper import (
+    cache_page,
+    get_cached_page,
+    init_bracket_cache,
+    make_etag,
+    set_cache_headers,
+)
 from helpers.db_helper import (
+    get_bracket_years,
     import_schedule,
-    return_week_dates,
-    get_current_round,
+    get_season_round,
     import_owners,
+    unit_of_work,
 )
+from helpers.engine_helper import database_binds, engine_options, init_engines, read_only
 from helpers.espn_api_helper import ESPNAPIHelper
-from models import db, Owner, Game, Team, Schedule
+from helpers.espn_cache_helper import init_espn_cache
+from helpers.espn_fixture_helper import StandInServer
+from helpers.http_helper import get_espn_session, init_espn_session
+from helpers.snapshot_helper import (
+    get_latest_season,
+    init_bracket_snapshots,
+    publish_snapshot,
+    snapshot_payload,
+)
+from helpers.stream_helper import get_bracket_broadcaster, init_bracket_broadcaster
+from models import db, Owner, Game, JobRun, Team, Schedule, SeasonVersion, Tournament
 
 import click
 import logging
+import orjson
 import os
+import queue
 from datetime import datetime
 
 
@@ -44,8 +70,16 @@ if app.config["ENVIRONMENT"] == "development":
         app.logger.removeHandler(handler)
 
 
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+app.config["SQLALCHEMY_BINDS"] = database_binds(app.config)
 db.init_app(app)
+init_engines(app, db)
 migrate = Migrate(app, db)
+init_bracket_cache(app)
+init_bracket_snapshots(app)
+init_bracket_broadcaster(app)
+init_espn_cache(app)
+init_espn_session(app)
 
 
 @app.route("/")
@@ -55,62 +89,90 @@ def hello_world():
 
 
 @app.route("/toilet_bowl/<int:year>")
+@read_only
 def toilet_bowl(year):
-    # Determine years available for drop-down box in template.
-    years = Game.query.with_entities(Game.year).distinct().all()
-    years = [y[0] for y in years]
-
-    formatted_schedule = return_week_dates(year, db, Schedule)
+    # The latest snapshot holds the whole bracket as published by the last update;
+    # seasons last updated before snapshots existed fall back to their version
+    season = get_latest_season(year)
+    version = season.version if season else 0
+    finished = season.finished if season else False
 
     # Determine playoff round
-    for scheduled_game in formatted_schedule:
-        week_start = (scheduled_game["week_start"],)
-        current_round = get_current_round(scheduled_game)
-
-    # Query the Game table to get the game data
-    games = Game.query.filter_by(year=year).all()
-
-    # Query the Team table to get team names based on team IDs
-    team_names = {}
-    for game in games:
-        if game.team1_id is not None and game.team2_id is not None:
-            team1 = Team.query.get(game.team1_id)
-            team2 = Team.query.get(game.team2_id)
-            team_names[game.id] = {
-                "team1_name": team1.name,
-                "team2_name": team2.name,
-                "team1_score": game.team1_score,
-                "team2_score": game.team2_score,
-            }
-        if game.team1_id is not None and game.team2_id is None:
-            team1 = Team.query.get(game.team1_id)
-            team_names[game.id] = {
-                "team1_name": team1.name,
-                "team2_name": "TBD",
-                "team1_score": game.team1_score,
-            }
-        if game.team2_id is not None and game.team1_id is None:
-            team2 = Team.query.get(game.team2_id)
-            team_names[game.id] = {
-                "team1_name": "TBD",
-                "team2_name": team2.name,
-                "team1_score": game.team_2.score,
-            }
-        if game.team1_id is None and game.team2_id is None:
-            team_names[game.id] = {"team1_name": "TBD", "team2_name": "TBD"}
-
-    # Pass the data to the template
-    return render_template(
-        "index.html",
-        round=current_round,
-        games=games,
-        team_names=team_names,
-        year=year,
-        years=years,
-        schedule=formatted_schedule,
+    current_round = get_season_round(year, version, Schedule)
+
+    # The page links to every season, so a new season changes it too
+    years = get_bracket_years(db, Tournament)
+
+    # Let the browser reuse its copy before anything is rendered
+    etag = make_etag("toilet_bowl", year, version, current_round, years)
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        # Serve the rendered page until the update commands publish a new snapshot
+        # or add a season
+        html = get_cached_page(year, current_round, version, years)
+        if html is None:
+            # Games, teams, seeds, scores and schedule already grouped by round.
+            bracket = orjson.loads(snapshot_payload(year, season))
+
+            # Pass the data to the template
+            html = render_template(
+                "index.html",
+                round=current_round,
+                rounds=bracket["rounds"],
+                year=year,
+                years=years,
+                version=version,
+                live=not finished,
+            )
+            cache_page(year, current_round, version, years, html, finished)
+        response = make_response(html)
+
+    return set_cache_headers(response, etag, season)
+
+
+@app.route("/toilet_bowl/<int:year>/stream")
+def toilet_bowl_stream(year):
+    broadcaster = get_bracket_broadcaster()
+    subscription = broadcaster.subscribe(year, request.args.get("version", type=int))
+    keep_alive = app.config["BRACKET_STREAM_KEEP_ALIVE"]
+
+    def events():
+        try:
+            while True:
+                try:
+                    games = subscription.get(timeout=keep_alive)
+                except queue.Empty:
+                    # Comment line so proxies don't close an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: games\ndata: {games.decode('utf-8')}\n\n"
+        finally:
+            broadcaster.unsubscribe(year, subscription)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@app.route("/api/toilet_bowl/<int:year>")
+@read_only
+def toilet_bowl_api(year):
+    season = get_latest_season(year)
+    version = season.version if season else 0
+
+    etag = make_etag("api", year, version)
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        response = make_response(snapshot_payload(year, season))
+        response.mimetype = "application/json"
+
+    return set_cache_headers(response, etag, season)
+
+
 @click.command(name="import_owners")
 @click.option(
     "--file",
@@ -138,21 +200,29 @@ app.cli.add_command(import_owners_command)
 @click.command(name="import_schedule")
 @click.option(
     "--year",
-    "year",
+    "years",
     required=True,
+    multiple=True,
     type=int,
-    help="Year to scrape and import schedule",
+    help="Year to scrape and import schedule (repeat for several years)",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Download the schedule pages again instead of using the cached ones",
 )
 @with_appcontext
-def import_schedule_command(year):
+def import_schedule_command(years, refresh):
     """
-    Run this custom command to import schedule from a scraped PFF dataframe.
+    Run this custom command to import the schedule scraped from pro-football-reference.
 
     Args:
-        year (int): year to scrape and import information
+        years (tuple): years to scrape and import information
+        refresh (bool): download the schedule pages again
 
     """
-    import_schedule(year, db, Schedule)
+    for year in years:
+        import_schedule(year, db, Schedule, Tournament, refresh=refresh)
     click.echo("Schedule imported successfully.")
 
 
@@ -266,10 +336,17 @@ def update_game_results_command(start_week, end_week, year):
         year (int): The year for which you want to update game results.
     """
     try:
+        session = get_espn_session()
+        requests_before = session.request_count()
         api_helper = ESPNAPIHelper(year)
-        league = api_helper.espn_api_call()
-        for week in range(start_week, end_week + 1):
-            api_helper.update_game_results(league, week)
+        # Only matchups and scores are needed, not the full League
+        league = api_helper.espn_api_call(slim=True)
+        api_helper.update_results(league, list(range(start_week, end_week + 1)))
+        app.logger.info(
+            f"ESPN requests for {year} weeks {start_week}-{end_week}: "
+            f"{session.request_count() - requests_before}"
+        )
+        app.logger.info(f"ESPN session: {session.summary()}")
 
     except Exception as e:
         click.echo(f"Unable to update game results: {str(e)}")
@@ -281,43 +358,266 @@ app.cli.add_command(update_game_results_command)
 @click.command(name="update_tournament")
 @click.option(
     "--start-week",
-    required=True,
+    required=False,
     type=int,
-    help="The starting week for updating game results",
+    help="Ignored: the whole bracket of the year is re-evaluated",
 )
 @click.option(
     "--end-week",
-    required=True,
+    required=False,
     type=int,
-    help="The ending week for updating game results",
+    help="Ignored: the whole bracket of the year is re-evaluated",
 )
 @click.option(
     "--year",
-    required=True,
+    required=False,
     type=int,
-    help="The year for which you want to update game results",
+    help="The year for which you want to update the tournament",
+)
+@click.option(
+    "--all-years",
+    is_flag=True,
+    help="Re-evaluate the bracket of every year with games",
 )
 @with_appcontext
-def update_tournament_command(start_week, end_week, year):
+def update_tournament_command(start_week, end_week, year, all_years):
     """
-    Run this custom command to update the tournament rounds for the given year.
+    Run this custom command to re-evaluate the tournament bracket for the given year,
+    for example after correcting a score.
 
     Args:
-        start_week (int): The starting week for updating game results.
-        end_week (int): The ending week for updating game results.
-        year (int): The year for which you want to update game results.
+        start_week (int): Ignored, kept for existing scripts.
+        end_week (int): Ignored, kept for existing scripts.
+        year (int): The year for which you want to update the tournament.
+        all_years (bool): Re-evaluate every year with games instead.
     """
-    try:
-        api_helper = ESPNAPIHelper(year)
-        for week in range(start_week, end_week + 1):
-            api_helper.update_tournament(week)
+    if all_years:
+        years = [y[0] for y in db.session.query(Game.year).distinct().order_by(Game.year)]
+    elif year is not None:
+        years = [year]
+    else:
+        raise click.UsageError("Pass --year or --all-years.")
 
-    except Exception as e:
-        click.echo(f"Unable to update game results: {str(e)}")
+    for year in years:
+        try:
+            changes = ESPNAPIHelper(year).update_tournament()
+            click.echo(f"{year}: {len(changes)} games updated.")
+        except Exception as e:
+            click.echo(f"Unable to update tournament for {year}: {str(e)}")
 
 
 app.cli.add_command(update_tournament_command)
 
+
+@click.command(name="publish_snapshots")
+@click.option(
+    "--year",
+    required=False,
+    type=int,
+    help="The year whose bracket snapshot you want to publish",
+)
+@click.option(
+    "--all-years",
+    is_flag=True,
+    help="Publish the bracket snapshot of every year with a season version",
+)
+@with_appcontext
+def publish_snapshots_command(year, all_years):
+    """
+    Run this custom command to publish the bracket snapshot of a year at its current
+    version. Updates publish their snapshots themselves; this backfills seasons
+    last updated before snapshots existed.
+
+    Args:
+        year (int): The year whose snapshot you want to publish.
+        all_years (bool): Publish every year with a season version instead.
+    """
+    if all_years:
+        years = [
+            y[0] for y in db.session.query(SeasonVersion.year).order_by(SeasonVersion.year)
+        ]
+    elif year is not None:
+        years = [year]
+    else:
+        raise click.UsageError("Pass --year or --all-years.")
+
+    for year in years:
+        try:
+            with unit_of_work(db):
+                snapshot = publish_snapshot(db.session, year)
+            click.echo(f"{year}: published version {snapshot.version}.")
+        except Exception as e:
+            click.echo(f"Unable to publish the snapshot for {year}: {str(e)}")
+
+
+app.cli.add_command(publish_snapshots_command)
+
+
+@click.command(name="espn_standin")
+@click.option(
+    "--fixtures",
+    "fixtures_directory",
+    required=True,
+    type=str,
+    help="Directory of fixtures recorded with ESPN_RECORD_PATH",
+)
+@click.option("--port", default=8001, type=int, help="Port to listen on")
+@click.option(
+    "--latency", default=0.0, type=float, help="Seconds to wait before each response"
+)
+@click.option(
+    "--error-rate",
+    default=0.0,
+    type=float,
+    help="Fraction of requests answered with an HTTP 503",
+)
+@click.option("--seed", default=None, type=int, help="Seed for the error injection")
+def espn_standin_command(fixtures_directory, port, latency, error_rate, seed):
+    """
+    Run a local stand-in for the ESPN API that replays recorded fixtures.
+    Point the app at it with ESPN_BASE_URL=http://127.0.0.1:<port>.
+
+    Args:
+        fixtures_directory (str): directory of recorded fixtures
+        port (int): port to listen on
+        latency (float): simulated latency in seconds
+        error_rate (float): fraction of requests answered with an HTTP 503
+        seed (int): seed for the error injection
+    """
+    server = StandInServer(
+        fixtures_directory,
+        port=port,
+        latency=latency,
+        error_rate=error_rate,
+        seed=seed,
+        verbose=True,
+    )
+    click.echo(
+        f"Serving {len(server.fixtures)} fixtures on {server.base_url}. Press CTRL+C to quit."
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+app.cli.add_command(espn_standin_command)
+
+
+@click.command(name="job_runs")
+@click.option("--job", default=None, type=str, help="Only show runs of this job")
+@click.option("--limit", default=20, type=int, help="Number of runs to show")
+@with_appcontext
+def job_runs_command(job, limit):
+    """
+    Show the most recent scheduler job runs.
+
+    Args:
+        job (str): only show runs of this job
+        limit (int): number of runs to show
+    """
+    query = JobRun.query
+    if job:
+        query = query.filter_by(job=job)
+    for run in query.order_by(JobRun.started_at.desc()).limit(limit):
+        click.echo(
+            f"{run.started_at:%Y-%m-%d %H:%M:%S} {run.job} {run.outcome} "
+            f"{run.duration:.3f}s on {run.holder}: {run.message or ''}"
+        )
+
+
+app.cli.add_command(job_runs_command)
+
+
+@click.command(name="benchmark_writes")
+@click.option("--rows", default=500, type=int, help="Teams and games written per run")
+@click.option(
+    "--database-url",
+    default=None,
+    type=str,
+    help="Scratch database to benchmark (defaults to a temporary SQLite file)",
+)
+def benchmark_writes_command(rows, database_url):
+    """
+    Compare committing every row with one batched unit of work per command run.
+
+    Args:
+        rows (int): teams and games written per run
+        database_url (str): scratch database to benchmark
+    """
+    for result in benchmark_writes(rows, database_url):
+        click.echo(
+            f"{result['mode']:<8} {result['step']:<15} "
+            f"{result['commits']:>6} commits {result['seconds']:>8.3f}s"
+        )
+
+
+app.cli.add_command(benchmark_writes_command)
+
+
+@click.command(name="benchmark_brackets")
+@click.option("--leagues", default=20, type=int, help="Synthetic leagues per league size")
+@click.option("--seasons", default=10, type=int, help="Seasons per league")
+@click.option(
+    "--sizes",
+    default="12,14,16",
+    type=str,
+    help="Comma separated league sizes",
+)
+@click.option(
+    "--database-url",
+    default=None,
+    type=str,
+    help="Scratch database to benchmark (defaults to a temporary SQLite file)",
+)
+def benchmark_brackets_command(leagues, seasons, sizes, database_url):
+    """
+    Time generating the brackets of many synthetic leagues and seasons.
+
+    Args:
+        leagues (int): synthetic leagues per league size
+        seasons (int): seasons per league
+        sizes (str): comma separated league sizes
+        database_url (str): scratch database to benchmark
+    """
+    sizes = tuple(int(size) for size in sizes.split(","))
+    for result in benchmark_brackets(leagues, seasons, sizes, database_url):
+        click.echo(
+            f"{result['teams']:>3} teams {result['step']:<10} "
+            f"{result['brackets']:>6} brackets {result['games']:>7} games "
+            f"{result['queries']:>7} queries {result['seconds']:>8.3f}s"
+        )
+
+
+app.cli.add_command(benchmark_brackets_command)
+
+
+@click.command(name="explain_queries")
+@click.option("--seasons", default=2000, type=int, help="Synthetic seasons to load")
+@click.option("--league-size", default=16, type=int, help="Teams per season")
+@click.option(
+    "--database-url",
+    default=None,
+    type=str,
+    help="Scratch database to load (defaults to a temporary SQLite file)",
+)
+def explain_queries_command(seasons, league_size, database_url):
+    """
+    Print the query plans of the hot queries against a large synthetic dataset.
+
+    Args:
+        seasons (int): synthetic seasons to load
+        league_size (int): teams per season
+        database_url (str): scratch database to load
+    """
+    for name, plan in explain_queries(seasons, league_size, database_url):
+        click.echo(name)
+        for line in plan:
+            click.echo(f"    {line}")
+
+
+app.cli.add_command(explain_queries_command)
+
 if app.config["ENVIRONMENT"] == "development":
     if __name__ == "__main__":
         app.run()
@@ -6,7 +6,14 @@ dotenv_path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(dotenv_path)
 
 
+# Read the version number from a file
+with open(os.path.join(os.path.dirname(__file__), "..", "VERSION")) as version_file:
+    version = version_file.read().strip()
+
+
 class Config:
+    APP_VERSION = version
+
     # Flask-related configuration options
     ENVIRONMENT = os.environ.get("ENVIRONMENT")
     SECRET_KEY = os.environ.get("SECRET_KEY")
@@ -19,6 +26,70 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool. Size and overflow apply to server databases such as Postgres;
+    # pre-ping and recycle (seconds) to every engine.
+    DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 5))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", 10))
+    DATABASE_POOL_PRE_PING = os.environ.get("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+    DATABASE_POOL_RECYCLE = int(os.environ.get("DATABASE_POOL_RECYCLE", 30 * 60))
+
+    # Optional read-only database for the page routes, e.g. a Postgres replica or,
+    # for SQLite, the same file opened read-only:
+    # sqlite:///file:/path/to/app.db?mode=ro&uri=true
+    DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL")
+
+    # Set on every SQLite connection. With WAL, readers don't wait for the poller's
+    # write transactions; busy timeout is in milliseconds, mmap size in bytes.
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+
+    # Rendered bracket page cache: "memory" (per worker process), "file" or "sqlite".
+    # Use "file" or "sqlite" so all gunicorn workers and the update commands share entries.
+    BRACKET_CACHE_BACKEND = os.environ.get("BRACKET_CACHE_BACKEND", "memory")
+    BRACKET_CACHE_PATH = os.environ.get("BRACKET_CACHE_PATH", "data/bracket_cache")
+    BRACKET_CACHE_SIZE = int(os.environ.get("BRACKET_CACHE_SIZE", 32))
+
+    # Seconds superseded bracket snapshots are kept, so readers holding an older
+    # version can still fetch it. The latest version of a season is always kept.
+    BRACKET_SNAPSHOT_RETENTION = int(os.environ.get("BRACKET_SNAPSHOT_RETENTION", 60 * 60))
+
+    # Seconds browsers and proxies may keep the bracket page of a finished season.
+    # The page still links to every season, so keep it short enough for a new
+    # season to show up; revalidating afterwards is a cheap 304.
+    BRACKET_FINISHED_MAX_AGE = int(
+        os.environ.get("BRACKET_FINISHED_MAX_AGE", 24 * 60 * 60)
+    )
+
+    # Live score stream. Each viewer holds a connection open, so run gunicorn with
+    # threaded (gthread) or async workers.
+    BRACKET_STREAM_POLL_INTERVAL = int(os.environ.get("BRACKET_STREAM_POLL_INTERVAL", 5))
+    BRACKET_STREAM_KEEP_ALIVE = int(os.environ.get("BRACKET_STREAM_KEEP_ALIVE", 15))
+
+    # Adaptive score polling by the scheduler, in seconds. Scores are polled every
+    # SCHEDULER_LIVE_INTERVAL while a week's games are on, backing off up to
+    # SCHEDULER_MAX_INTERVAL while they don't move. A week that has played out but isn't
+    # final on ESPN yet is checked every SCHEDULER_FINAL_INTERVAL; once every week is
+    # Completed only the schedule is rechecked, every SCHEDULER_IDLE_INTERVAL.
+    SCHEDULER_LIVE_INTERVAL = int(os.environ.get("SCHEDULER_LIVE_INTERVAL", 60))
+    SCHEDULER_MAX_INTERVAL = int(os.environ.get("SCHEDULER_MAX_INTERVAL", 30 * 60))
+    SCHEDULER_FINAL_INTERVAL = int(os.environ.get("SCHEDULER_FINAL_INTERVAL", 60 * 60))
+    SCHEDULER_IDLE_INTERVAL = int(os.environ.get("SCHEDULER_IDLE_INTERVAL", 24 * 60 * 60))
+    # How long after the last kickoff of a week its games may still be playing
+    SCHEDULER_GAME_LENGTH = int(os.environ.get("SCHEDULER_GAME_LENGTH", 4 * 60 * 60))
+    # Seconds the active scheduler's lease lasts; it is renewed every third of that
+    SCHEDULER_LEASE_TTL = int(os.environ.get("SCHEDULER_LEASE_TTL", 90))
+
+    # Toilet Bowl bracket shape. TOURNAMENT_TEAMS teams from the bottom of the
+    # standings play (0 for the bottom half of the league), finishing in
+    # TOURNAMENT_FINAL_WEEK. Populating a season stores its shape with the league's
+    # number of teams, so changing these only affects seasons populated afterwards.
+    # Seasons not populated yet are shown as a TOURNAMENT_LEAGUE_SIZE-team league.
+    TOURNAMENT_TEAMS = int(os.environ.get("TOURNAMENT_TEAMS", 0))
+    TOURNAMENT_FINAL_WEEK = int(os.environ.get("TOURNAMENT_FINAL_WEEK", 17))
+    TOURNAMENT_LEAGUE_SIZE = int(os.environ.get("TOURNAMENT_LEAGUE_SIZE", 12))
+
     # Logging configuration
     LOG_FILENAME = "logs/espn-toilet.log"
     LOG_LEVEL = "DEBUG"  # Adjust this based on your needs
@@ -29,3 +100,30 @@ class Config:
     ESPN_LEAGUE_ID = os.environ.get("LEAGUE_ID")
     ESPN_S2 = os.environ.get("ESPN_S2")
     SWID = os.environ.get("SWID")
+
+    # ESPN response cache. Final scoring periods are kept forever; live data
+    # expires after ESPN_CACHE_LIVE_TTL seconds.
+    ESPN_CACHE_PATH = os.environ.get("ESPN_CACHE_PATH", "data/espn_cache")
+    ESPN_CACHE_LIVE_TTL = int(os.environ.get("ESPN_CACHE_LIVE_TTL", 60))
+
+    # pro-football-reference schedule pages, kept per year for offline imports
+    SCHEDULE_CACHE_PATH = os.environ.get("SCHEDULE_CACHE_PATH", "data/schedule_cache")
+
+    # ESPN HTTP session: timeouts in seconds, requests per second (and burst) per
+    # league cookie, retries with jittered exponential backoff starting at ESPN_RETRY_BACKOFF.
+    # No retry waits longer than ESPN_RETRY_MAX_DELAY; a Retry-After beyond it gives up.
+    ESPN_CONNECT_TIMEOUT = float(os.environ.get("ESPN_CONNECT_TIMEOUT", 3.05))
+    ESPN_READ_TIMEOUT = float(os.environ.get("ESPN_READ_TIMEOUT", 20))
+    ESPN_RATE_LIMIT = float(os.environ.get("ESPN_RATE_LIMIT", 2))
+    ESPN_RATE_BURST = int(os.environ.get("ESPN_RATE_BURST", 5))
+    ESPN_MAX_RETRIES = int(os.environ.get("ESPN_MAX_RETRIES", 4))
+    ESPN_RETRY_BACKOFF = float(os.environ.get("ESPN_RETRY_BACKOFF", 0.5))
+    ESPN_RETRY_MAX_DELAY = float(os.environ.get("ESPN_RETRY_MAX_DELAY", 30))
+
+    # Weeks of box scores fetched concurrently by update_game_results
+    ESPN_MAX_WORKERS = int(os.environ.get("ESPN_MAX_WORKERS", 4))
+
+    # Offline runs: ESPN_BASE_URL points requests at the local stand-in
+    # (flask espn_standin), ESPN_RECORD_PATH saves every fetched response as a fixture.
+    ESPN_BASE_URL = os.environ.get("ESPN_BASE_URL")
+    ESPN_RECORD_PATH = os.environ.get("ESPN_RECORD_PATH")
@@ -0,0 +1,494 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import Flask, current_app
+from sqlalchemy import (
+    case,
+    create_engine,
+    distinct,
+    event,
+    func,
+    insert,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.orm import Session
+from helpers.bracket_helper import (
+    add_bracket_games,
+    bracket_games,
+    bracket_seeds,
+    build_bracket,
+)
+from helpers.cache_helper import init_bracket_cache
+from helpers.espn_api_helper import ESPNAPIHelper
+from models import (
+    db,
+    BracketSnapshot,
+    Game,
+    Owner,
+    Schedule,
+    SeasonVersion,
+    Team,
+    Tournament,
+)
+
+# Year given to synthetic rows so they never mix with a real season
+BENCHMARK_YEAR = 1900
+
+
+def scratch_engine(database_url=None):
+    """
+    Engine on a scratch database with the app's tables, a temporary SQLite file
+    unless a database URL is given.
+
+    Returns:
+        tuple: engine and the temporary file to delete afterwards (or None)
+    """
+    path = None
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    engine = create_engine(database_url)
+    db.metadata.create_all(engine)
+    return engine, path
+
+
+def run_timed(engine, work):
+    """
+    Run a unit of work in its own session, counting its commits.
+
+    Returns:
+        tuple: commits and wall time in seconds
+    """
+    with Session(engine) as session:
+        return count_commits(session, lambda: work(session))
+
+
+def count_commits(session, work):
+    """
+    Run work(), counting the commits of a session.
+
+    Returns:
+        tuple: commits and wall time in seconds
+    """
+    commits = []
+
+    def on_commit(session):
+        commits.append(1)
+
+    event.listen(session, "after_commit", on_commit)
+    try:
+        start = time.perf_counter()
+        work()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(session, "after_commit", on_commit)
+    return len(commits), elapsed
+
+
+@contextmanager
+def scratch_app(database_url=None):
+    """
+    App context on a scratch database with the current app's config, so helpers
+    that write through db.session run against it instead of the real database.
+    Its bracket cache lives in memory, so invalidating it never reaches the real one.
+
+    Args:
+        database_url (str, optional): scratch database to use. Defaults to a
+            temporary SQLite file.
+    """
+    path = None
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+
+    app = Flask(__name__)
+    app.config.update(current_app.config)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["SQLALCHEMY_BINDS"] = {}
+    app.config["BRACKET_CACHE_BACKEND"] = "memory"
+    db.init_app(app)
+    init_bracket_cache(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        if path is not None:
+            os.remove(path)
+
+
+def benchmark_league(teams):
+    """
+    Stand-in for the ESPN league read by update_game_results: its teams, and the
+    current NFL week set to the first one so every game is written as In Progress.
+    """
+    return SimpleNamespace(
+        league_id=0,
+        nfl_week=1,
+        teams=[
+            SimpleNamespace(team_id=team_id, team_name=f"Team {team_id}")
+            for team_id in range(1, teams + 1)
+        ],
+    )
+
+
+def benchmark_writes(rows, database_url=None):
+    """
+    Compare committing every row with committing one batched unit of work, running
+    the update pipeline's own writes: update_or_add_teams, then
+    update_game_results. Box scores are preloaded, so nothing is fetched from ESPN.
+
+    Args:
+        rows (int): teams and games written per run
+        database_url (str, optional): scratch database to use; never a real one,
+            since its owner, game, team and season version tables are written to
+
+    Returns:
+        list: one dict per run with its mode, step, commits and seconds
+    """
+    results = []
+    years = (BENCHMARK_YEAR, BENCHMARK_YEAR + 1)
+    with scratch_app(database_url):
+        session = db.session()
+        owners = [
+            Owner(espn_id=f"benchmark-{i}", name=f"Owner {i}") for i in range(rows)
+        ]
+        session.add_all(owners)
+        session.flush()
+        # update_or_add_teams stores the owner's ESPN id as the team's owner_id,
+        # so give the owners ESPN ids that are also their ids
+        owner_ids = [owner.id for owner in owners]
+        for owner in owners:
+            owner.espn_id = str(owner.id)
+        session.commit()
+
+        try:
+            # One game per week, so a week's results are one row
+            weeks = list(range(1, rows + 1))
+            league = benchmark_league(rows)
+            for mode, year in zip(("per row", "batched"), years):
+                helper = ESPNAPIHelper(year)
+                team_owners = list(zip(league.teams, owners))
+
+                def add_teams():
+                    if mode == "per row":
+                        for team_owner in team_owners:
+                            with helper.unit_of_work():
+                                helper.update_or_add_teams([team_owner])
+                    else:
+                        with helper.unit_of_work():
+                            helper.update_or_add_teams(team_owners)
+
+                def update_results():
+                    if mode == "per row":
+                        for week in weeks:
+                            helper.update_game_results(league, week)
+                    else:
+                        helper.update_results(league, weeks)
+
+                commits, elapsed = count_commits(session, add_teams)
+                results.append(
+                    {"mode": mode, "step": "add teams", "commits": commits, "seconds": elapsed}
+                )
+
+                teams = Team.query.filter_by(year=year).order_by(Team.espn_team_id).all()
+                session.add_all(
+                    Game(
+                        year=year,
+                        week=week,
+                        round=1,
+                        team1_id=team.id,
+                        team2_id=teams[week % rows].id,
+                        status="Scheduled",
+                    )
+                    for week, team in zip(weeks, teams)
+                )
+                session.commit()
+                for week, team in zip(weeks, teams):
+                    opponent = teams[week % rows]
+                    helper.box_score_indexes[(league.league_id, week)] = {
+                        team.espn_team_id: (100 + week, [], 0),
+                        opponent.espn_team_id: (90, [], 0),
+                    }
+
+                commits, elapsed = count_commits(session, update_results)
+                results.append(
+                    {"mode": mode, "step": "update results", "commits": commits, "seconds": elapsed}
+                )
+        finally:
+            session.rollback()
+            for model in (Game, Team, SeasonVersion, BracketSnapshot):
+                session.query(model).filter(model.year.in_(years)).delete(
+                    synchronize_session=False
+                )
+            session.query(Owner).filter(Owner.id.in_(owner_ids)).delete(
+                synchronize_session=False
+            )
+            session.commit()
+    return results
+
+
+def benchmark_brackets(leagues, seasons, sizes=(12, 14, 16), database_url=None):
+    """
+    Generate the Toilet Bowl brackets of many synthetic leagues and seasons, the
+    way populate_tournament does: one query for the seeded teams, one for the
+    existing games and one batched insert per season. Each season is then
+    populated again, which must find every game and insert nothing.
+
+    Args:
+        leagues (int): synthetic leagues per league size
+        seasons (int): seasons per league
+        sizes (tuple, optional): league sizes. Defaults to 12, 14 and 16 teams.
+        database_url (str, optional): scratch database to use; never a real one,
+            since its game, team and season version tables are written to
+
+    Returns:
+        list: one dict per league size and pass with the brackets, games inserted,
+        queries and seconds
+    """
+    engine, path = scratch_engine(database_url)
+    queries = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: queries.append(1)
+    )
+    years = {}
+    for size in sizes:
+        start = BENCHMARK_YEAR + sum(len(y) for y in years.values())
+        years[size] = range(start, start + leagues * seasons)
+
+    results = []
+    try:
+        with Session(engine) as session:
+            session.add_all(
+                Team(year=year, name=f"Team {seed}", espn_team_id=seed, owner_id=seed)
+                for size in sizes
+                for year in years[size]
+                for seed in range(1, size + 1)
+            )
+            session.commit()
+
+        for size in sizes:
+            for step in ("generate", "regenerate"):
+                inserted = []
+
+                def populate(session):
+                    for year in years[size]:
+                        bracket = build_bracket(size)
+                        seed_names = {
+                            seed: f"Team {seed}" for seed in bracket_seeds(bracket)
+                        }
+                        result = add_bracket_games(
+                            session, Game, Team, year, bracket, seed_names
+                        )
+                        inserted.extend(result["inserted"])
+                        session.commit()
+
+                queries.clear()
+                commits, elapsed = run_timed(engine, populate)
+                results.append(
+                    {
+                        "teams": size,
+                        "step": step,
+                        "brackets": len(years[size]),
+                        "games": len(inserted),
+                        "queries": len(queries),
+                        "seconds": elapsed,
+                    }
+                )
+    finally:
+        all_years = [year for size in sizes for year in years[size]]
+        with Session(engine) as session:
+            for model in (Game, Team, SeasonVersion):
+                session.query(model).filter(
+                    model.year.between(min(all_years), max(all_years))
+                ).delete(synchronize_session=False)
+            session.commit()
+        engine.dispose()
+        if path is not None:
+            os.remove(path)
+    return results
+
+
+def hot_queries(year, week):
+    """
+    The queries run on every page view, poll and import, as (name, statement).
+    """
+    return [
+        ("bracket years", select(Tournament.year).order_by(Tournament.year)),
+        (
+            "season games",
+            select(Game).where(Game.year == year).order_by(Game.round, Game.id),
+        ),
+        ("week games", select(Game).where(Game.year == year, Game.week == week)),
+        (
+            "poll weeks",
+            select(
+                Game.week,
+                func.count(Game.id),
+                func.count(case((Game.status == "Completed", None), else_=1)),
+            )
+            .where(Game.year == year)
+            .group_by(Game.week),
+        ),
+        (
+            "game by seed",
+            select(Game).where(
+                Game.year == year, Game.week == week, Game.team1_seed == 7
+            ),
+        ),
+        (
+            "season version",
+            select(
+                func.count(distinct(Game.round)),
+                func.count(case((Game.status == "Completed", None), else_=1)),
+            ).where(Game.year == year),
+        ),
+        (
+            "seeded teams",
+            select(Team.name, Team.id).where(
+                Team.year == year, Team.name.in_(["Team 7", "Team 8"])
+            ),
+        ),
+        (
+            "owner teams",
+            select(Team).where(
+                tuple_(Team.owner_id, Team.year).in_([(1, year), (2, year)]),
+                Team.owner_id.in_([1, 2]),
+                Team.year.in_([year]),
+            ),
+        ),
+        ("season bracket", select(Tournament).where(Tournament.year == year)),
+        (
+            "owners",
+            select(Owner).where(Owner.espn_id.in_(["benchmark-1", "benchmark-2"])),
+        ),
+        (
+            "season schedule",
+            select(Schedule).where(Schedule.year == year).order_by(Schedule.week),
+        ),
+    ]
+
+
+def explain_queries(seasons, league_size=16, database_url=None):
+    """
+    Load a large synthetic dataset and return the query plans of the hot queries,
+    to check that they use the indexes.
+
+    Args:
+        seasons (int): synthetic seasons to load
+        league_size (int, optional): teams per season. Defaults to 16.
+        database_url (str, optional): scratch database to use; never a real one,
+            since its game, team, owner, schedule, tournament and season version
+            tables are written to
+
+    Returns:
+        list: (query name, plan lines) per hot query
+    """
+    engine, path = scratch_engine(database_url)
+    years = range(BENCHMARK_YEAR, BENCHMARK_YEAR + seasons)
+    bracket = build_bracket(league_size)
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                insert(Owner),
+                [
+                    {"espn_id": f"benchmark-{owner}", "name": f"Owner {owner}"}
+                    for owner in range(1, league_size + 1)
+                ],
+            )
+            connection.execute(
+                insert(Team),
+                [
+                    {
+                        "year": year,
+                        "name": f"Team {seed}",
+                        "espn_team_id": seed,
+                        "owner_id": seed,
+                    }
+                    for year in years
+                    for seed in range(1, league_size + 1)
+                ],
+            )
+            team_ids = {
+                (year, name): team_id
+                for team_id, year, name in connection.execute(
+                    select(Team.id, Team.year, Team.name).where(
+                        Team.year.between(years[0], years[-1])
+                    )
+                )
+            }
+            games = []
+            for year in years:
+                seed_teams = {
+                    seed: team_ids[(year, f"Team {seed}")]
+                    for seed in bracket_seeds(bracket)
+                }
+                games.extend(
+                    {**row, "status": "Completed"}
+                    for _, row in bracket_games(bracket, year, seed_teams)
+                )
+            connection.execute(insert(Game), games)
+            connection.execute(
+                insert(Tournament),
+                [
+                    {
+                        "year": year,
+                        "league_size": league_size,
+                        "bracket_size": bracket["bracket_size"],
+                        "final_week": bracket["final_week"],
+                    }
+                    for year in years
+                ],
+            )
+            connection.execute(
+                insert(Schedule),
+                [
+                    {
+                        "year": year,
+                        "week": week,
+                        "week_start": datetime(year, 12, 1) + timedelta(weeks=week - 15),
+                        "early_game_date_time": datetime(year, 12, 3)
+                        + timedelta(weeks=week - 15),
+                        "late_game_date_time": datetime(year, 12, 7)
+                        + timedelta(weeks=week - 15),
+                    }
+                    for year in years
+                    for week in range(bracket["start_week"], bracket["start_week"] + bracket["rounds"])
+                ],
+            )
+            connection.execute(text("ANALYZE"))
+
+        explain = (
+            "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+        )
+        plans = []
+        with engine.connect() as connection:
+            for name, statement in hot_queries(years[len(years) // 2], bracket["start_week"]):
+                sql = statement.compile(
+                    dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                )
+                rows = connection.exec_driver_sql(explain + str(sql)).all()
+                plans.append((name, [str(row[-1]) for row in rows]))
+    finally:
+        with Session(engine) as session:
+            for model in (Game, Schedule, Team, SeasonVersion, Tournament):
+                session.query(model).filter(
+                    model.year.between(years[0], years[-1])
+                ).delete(synchronize_session=False)
+            session.query(Owner).filter(Owner.espn_id.like("benchmark-%")).delete(
+                synchronize_session=False
+            )
+            session.commit()
+        engine.dispose()
+        if path is not None:
+            os.remove(path)
+    return plans
@@ -0,0 +1,404 @@
+import math
+from collections import defaultdict
+
+
+def standard_order(size):
+    """
+    Bracket positions of ranks 1..size in a standard seeded bracket, where rank 1
+    can only meet rank 2 in the last round.
+    """
+    order = [1, 2]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [rank for position in order for rank in (position, total - position)]
+    return order[:size]
+
+
+def build_bracket(league_size, bracket_size=None, final_week=17):
+    """
+    Build the definition of a Toilet Bowl bracket for a league.
+
+    The bottom bracket_size teams of the standings play, and the loser of each game
+    moves on, so the loser of the last game is the Toilet Bowl champion. The worst
+    seeds are the favorites and get the byes. Each slot names where its two teams
+    come from: ("seed", n) for a seeded team, ("loser", slot) for the loser of an
+    earlier slot.
+
+    For a 12-team league this is the original bracket: 7 vs 10 and 8 vs 9 in
+    round 1, 11 and 12 on a bye meeting those losers in round 2, then the final.
+
+    Args:
+        league_size (int): number of teams in the league
+        bracket_size (int, optional): number of teams in the bracket. Defaults to
+            the bottom half of the league.
+        final_week (int, optional): week of the last round. Defaults to 17.
+
+    Returns:
+        dict: league size, bracket size, rounds, byes, start and final week and slots
+    """
+    bracket_size = bracket_size or league_size // 2
+    if not 2 <= bracket_size <= league_size:
+        raise ValueError(
+            f"Cannot build a {bracket_size}-team bracket for a {league_size}-team league"
+        )
+    rounds = math.ceil(math.log2(bracket_size))
+    size = 2**rounds
+
+    def seed(rank):
+        # Rank 1 is the last team of the standings
+        return league_size + 1 - rank if rank <= bracket_size else None
+
+    order = standard_order(size)
+    pairs = [(order[i], order[i + 1]) for i in range(0, size, 2)][::-1]
+
+    slots = []
+    entries = []
+    for rank1, rank2 in pairs:
+        seeds = [seed(rank) for rank in (rank1, rank2) if seed(rank) is not None]
+        if len(seeds) == 1:
+            # Bye
+            entries.append(("seed", seeds[0]))
+            continue
+        name = f"r1g{len(slots) + 1}"
+        slots.append(
+            {
+                "name": name,
+                "round": 1,
+                "team1": ("seed", min(seeds)),
+                "team2": ("seed", max(seeds)),
+            }
+        )
+        entries.append(("loser", name))
+
+    for round_number in range(2, rounds + 1):
+        next_entries = []
+        for i in range(0, len(entries), 2):
+            source1, source2 = entries[i], entries[i + 1]
+            if source1[0] == "seed" and source2[0] == "seed":
+                source1, source2 = sorted((source1, source2))
+            elif source2[0] == "seed":
+                # A team coming off a bye is team1
+                source1, source2 = source2, source1
+            name = f"r{round_number}g{i // 2 + 1}"
+            slots.append(
+                {"name": name, "round": round_number, "team1": source1, "team2": source2}
+            )
+            next_entries.append(("loser", name))
+        entries = next_entries
+
+    return {
+        "league_size": league_size,
+        "bracket_size": bracket_size,
+        "rounds": rounds,
+        "byes": size - bracket_size,
+        "start_week": final_week - rounds + 1,
+        "final_week": final_week,
+        "slots": slots,
+    }
+
+
+BRACKET_COLUMNS = (
+    "team1_id",
+    "team1_seed",
+    "team2_id",
+    "team2_seed",
+    "winner_team_id",
+    "loser_team_id",
+    "status",
+)
+
+
+def ordered_slots(bracket):
+    """
+    Slots of a bracket in the order they are played.
+    """
+    return sorted(bracket["slots"], key=lambda slot: slot["round"])
+
+
+def slot_seeds(bracket):
+    """
+    Seeds that can reach each slot of a bracket.
+
+    Returns:
+        dict: slot name -> set of seeds
+    """
+    seeds = {}
+    for slot in ordered_slots(bracket):
+        seeds[slot["name"]] = set()
+        for kind, value in (slot["team1"], slot["team2"]):
+            seeds[slot["name"]] |= {value} if kind == "seed" else seeds[value]
+    return seeds
+
+
+def match_games(bracket, games):
+    """
+    Match the games of a season to the slots of a bracket.
+
+    A game goes to the slot of its round that the seeds already in it can reach.
+    Games without seeds yet fill the remaining slots of their round in creation
+    order.
+
+    Args:
+        bracket (dict): bracket definition
+        games (list): Game rows of the season
+
+    Returns:
+        dict: slot name -> Game
+    """
+    seeds = slot_seeds(bracket)
+    games_by_round = defaultdict(list)
+    for game in sorted(games, key=lambda game: game.id or 0):
+        games_by_round[game.round].append(game)
+
+    matched = {}
+    open_slots = defaultdict(list)
+    for slot in ordered_slots(bracket):
+        unmatched = games_by_round[slot["round"]]
+        for game in unmatched:
+            known = {seed for seed in (game.team1_seed, game.team2_seed) if seed}
+            if known and known <= seeds[slot["name"]]:
+                matched[slot["name"]] = game
+                unmatched.remove(game)
+                break
+        else:
+            open_slots[slot["round"]].append(slot["name"])
+
+    for round_number, names in open_slots.items():
+        unseeded = [
+            game
+            for game in games_by_round[round_number]
+            if not game.team1_seed and not game.team2_seed
+        ]
+        matched.update(zip(names, unseeded))
+    return matched
+
+
+def tournament_bracket(tournament):
+    """
+    Bracket definition of a season from its stored Tournament shape.
+    """
+    return build_bracket(
+        tournament.league_size, tournament.bracket_size, tournament.final_week
+    )
+
+
+def check_bracket(bracket, games):
+    """
+    Check that the stored games of a season fit a bracket definition: every game
+    is in a week of the bracket's schedule, every seed plays in it and every game
+    matches a slot.
+
+    Raises:
+        ValueError: describing the first disagreement found
+    """
+    seeds = set(bracket_seeds(bracket))
+    name = f"{bracket['bracket_size']}-team bracket of a {bracket['league_size']}-team league"
+    for game in games:
+        if game.round > bracket["rounds"] or game.week != bracket["start_week"] + game.round - 1:
+            raise ValueError(
+                f"Game {game.id} (round {game.round}, week {game.week}) is not in the {name}"
+            )
+        if not {game.team1_seed, game.team2_seed} - {None} <= seeds:
+            raise ValueError(
+                f"Game {game.id} seeds {game.team1_seed} and {game.team2_seed} are not in the {name}"
+            )
+    unmatched = len(games) - len(match_games(bracket, games))
+    if unmatched:
+        raise ValueError(f"{unmatched} games don't match a slot of the {name}")
+
+
+def game_result(game, team1, team2):
+    """
+    Winner and loser of a Completed game, as (team id, seed) pairs. Ties go to
+    team1, as they always have.
+    """
+    if (
+        game.status != "Completed"
+        or team1[0] is None
+        or team2[0] is None
+        or game.team1_score is None
+        or game.team2_score is None
+    ):
+        return None
+    if game.team2_score > game.team1_score:
+        return {"winner": team2, "loser": team1}
+    return {"winner": team1, "loser": team2}
+
+
+def evaluate_bracket(bracket, games):
+    """
+    Resolve a season's bracket from its games and compute the changes needed to
+    bring every game in line: teams and seeds of each slot, winner and loser of
+    each Completed game and the status of games that just got their teams.
+
+    Every game is visited once, so a season costs O(games), and re-running it over
+    a historical season after correcting a score reassigns every slot downstream.
+
+    Args:
+        bracket (dict): bracket definition
+        games (list): Game rows of the season
+
+    Returns:
+        list: (Game, dict of changed column values) for each game that changes
+    """
+    matched = match_games(bracket, games)
+
+    # A team keeps its seed through the whole bracket
+    seed_teams = {}
+    for game in games:
+        for team_id, seed in (
+            (game.team1_id, game.team1_seed),
+            (game.team2_id, game.team2_seed),
+        ):
+            if team_id is not None and seed:
+                seed_teams.setdefault(seed, team_id)
+
+    results = {}
+    changes = []
+    for slot in ordered_slots(bracket):
+        game = matched.get(slot["name"])
+        if game is None:
+            continue
+
+        teams = []
+        for position, (kind, value) in (("team1", slot["team1"]), ("team2", slot["team2"])):
+            if kind == "seed":
+                if value in seed_teams:
+                    teams.append((seed_teams[value], value))
+                else:
+                    # Keep whatever the game has for a seed we know nothing about
+                    teams.append(
+                        (getattr(game, f"{position}_id"), getattr(game, f"{position}_seed"))
+                    )
+            elif value in results:
+                teams.append(results[value][kind])
+            else:
+                teams.append((None, None))
+
+        wanted = {
+            "team1_id": teams[0][0],
+            "team1_seed": teams[0][1],
+            "team2_id": teams[1][0],
+            "team2_seed": teams[1][1],
+            "status": game.status,
+        }
+        filled = any(
+            wanted[f"{position}_id"] is not None
+            and wanted[f"{position}_id"] != getattr(game, f"{position}_id")
+            for position in ("team1", "team2")
+        )
+        if filled and game.status in (None, "Pending"):
+            wanted["status"] = "Scheduled"
+
+        result = game_result(game, teams[0], teams[1])
+        if result is not None:
+            results[slot["name"]] = result
+        wanted["winner_team_id"] = result["winner"][0] if result else None
+        wanted["loser_team_id"] = result["loser"][0] if result else None
+
+        changed = {
+            column: wanted[column]
+            for column in BRACKET_COLUMNS
+            if getattr(game, column) != wanted[column]
+        }
+        if changed:
+            changes.append((game, changed))
+    return changes
+
+
+def bracket_seeds(bracket):
+    """
+    Seeds playing in a bracket.
+    """
+    return sorted(
+        {
+            value
+            for slot in bracket["slots"]
+            for kind, value in (slot["team1"], slot["team2"])
+            if kind == "seed"
+        }
+    )
+
+
+def bracket_games(bracket, year, seed_teams):
+    """
+    Build the games of a bracket in memory.
+
+    Args:
+        bracket (dict): bracket definition
+        year (int): year of the games
+        seed_teams (dict): seed -> Team id
+
+    Returns:
+        list: (slot name, Game column values) for every slot whose seeded teams
+        are all known
+    """
+    games = []
+    for slot in ordered_slots(bracket):
+        # Every row has the same columns so the games are inserted in one batch
+        row = {
+            "year": year,
+            "week": bracket["start_week"] + slot["round"] - 1,
+            "round": slot["round"],
+            "team1_id": None,
+            "team1_seed": None,
+            "team2_id": None,
+            "team2_seed": None,
+        }
+        complete = True
+        for position, (kind, value) in (("team1", slot["team1"]), ("team2", slot["team2"])):
+            if kind == "seed":
+                complete = complete and value in seed_teams
+                row[f"{position}_id"] = seed_teams.get(value)
+                row[f"{position}_seed"] = value
+        if not complete:
+            continue
+        both_known = row["team1_id"] is not None and row["team2_id"] is not None
+        row["status"] = "Scheduled" if both_known else "Pending"
+        games.append((slot["name"], row))
+    return games
+
+
+def add_bracket_games(session, Game, Team, year, bracket, seed_names):
+    """
+    Create the games of a season's bracket that don't exist yet.
+
+    The seeded teams are resolved in one query, the existing games of the season
+    are loaded in another and matched to the bracket slots, and the missing games
+    are inserted in one batch. Nothing is committed.
+
+    Args:
+        session (Session): database session
+        Game (Game): Game model
+        Team (Team): Team model
+        year (int): year of the bracket
+        bracket (dict): bracket definition
+        seed_names (dict): seed -> team name from the standings
+
+    Returns:
+        dict: "inserted" and "existing" games, and the "missing" team names not
+        found for the year
+    """
+    team_ids = dict(
+        session.query(Team.name, Team.id).filter(
+            Team.year == year, Team.name.in_(list(seed_names.values()))
+        )
+    )
+    seed_teams = {
+        seed: team_ids[name] for seed, name in seed_names.items() if name in team_ids
+    }
+
+    existing = match_games(bracket, session.query(Game).filter_by(year=year).all())
+    inserted = [
+        Game(**row)
+        for name, row in bracket_games(bracket, year, seed_teams)
+        if name not in existing
+    ]
+    session.add_all(inserted)
+    session.flush()
+
+    return {
+        "inserted": inserted,
+        "existing": list(existing.values()),
+        "missing": [name for name in seed_names.values() if name not in team_ids],
+    }
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from flask import current_app
+
+
+class LRUCache:
+    """
+    In-process least recently used cache. Entries are only shared by threads of
+    the same worker process.
+    """
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, pinned=False):
+        """
+        Store a value. Pinned entries are never evicted to make room for others.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if pinned:
+                self._pinned.add(key)
+            else:
+                self._pinned.discard(key)
+
+            unpinned = [k for k in self._entries if k not in self._pinned]
+            while len(self._entries) - len(self._pinned) > self.max_size and unpinned:
+                del self._entries[unpinned.pop(0)]
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._pinned.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+
+class FileCache:
+    """
+    Cache stored as one file per key in a directory, shared by every process on the host.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(
+            self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()
+        )
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value, pinned=False):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(value)
+        # Replace atomically so readers never see a partially written entry
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+class SQLiteCache:
+    """
+    Cache stored in a SQLite database file, shared by every process on the host.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, pinned=False):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def delete(self, key):
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM cache")
+
+
+def create_cache(config):
+    """
+    Create the cache backend selected in the app configuration.
+
+    Args:
+        config (Config): Flask app configuration
+
+    Returns:
+        LRUCache | FileCache | SQLiteCache: cache backend
+    """
+    backend = config["BRACKET_CACHE_BACKEND"]
+    if backend == "memory":
+        return LRUCache(config["BRACKET_CACHE_SIZE"])
+    if backend == "file":
+        return FileCache(config["BRACKET_CACHE_PATH"])
+    if backend == "sqlite":
+        return SQLiteCache(config["BRACKET_CACHE_PATH"])
+    raise ValueError(f"Unknown bracket cache backend: {backend}")
+
+
+def init_bracket_cache(app):
+    app.extensions["bracket_cache"] = create_cache(app.config)
+
+
+def get_bracket_cache():
+    return current_app.extensions["bracket_cache"]
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from the given parts (resource, year, season data version...)
+    and the app version, so a deploy changes it too.
+    """
+    key = ":".join(str(part) for part in parts + (current_app.config["APP_VERSION"],))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def cache_control(finished):
+    """
+    Cache-Control header value for a bracket page. Finished seasons can be kept
+    by browsers and proxies for a long time; the current season must be revalidated.
+    """
+    if finished:
+        return f"public, max-age={current_app.config['BRACKET_FINISHED_MAX_AGE']}"
+    return "public, no-cache"
+
+
+def set_cache_headers(response, etag, season):
+    """
+    Set the ETag, Last-Modified and Cache-Control headers of a bracket response.
+
+    Args:
+        response (Response): Flask response
+        etag (str): strong ETag of the response
+        season (BracketSnapshot | SeasonVersion): latest state of the season, or
+            None for a season without games
+    """
+    response.set_etag(etag)
+    if season:
+        response.last_modified = season.updated_at
+    response.headers["Cache-Control"] = cache_control(season.finished if season else False)
+    return response
+
+
+def get_cached_page(year, round, version, years):
+    """
+    Return the rendered bracket page for a year, or None if it is not cached or
+    was rendered for a different playoff round, season data version or list of
+    years. The years are part of the entry because every page links to the other
+    seasons, and a new season is added by a process whose invalidation never
+    reaches the web workers' caches.
+    """
+    entry = get_bracket_cache().get(f"toilet_bowl:{year}")
+    if entry is None:
+        return None
+    entry = json.loads(entry)
+    if (
+        entry["round"] != round
+        or entry["version"] != version
+        or entry.get("years") != list(years)
+    ):
+        return None
+    return entry["html"]
+
+
+def cache_page(year, round, version, years, html, finished):
+    """
+    Store the rendered bracket page for a year. Pages of finished seasons are
+    pinned so they are never evicted.
+    """
+    get_bracket_cache().set(
+        f"toilet_bowl:{year}",
+        json.dumps(
+            {"round": round, "version": version, "years": list(years), "html": html}
+        ),
+        pinned=finished,
+    )
+
+
+def invalidate_bracket(year=None):
+    """
+    Drop the cached bracket page for a year, or for every year if none is given.
+    """
+    cache = get_bracket_cache()
+    if year is None:
+        cache.clear()
+    else:
+        cache.delete(f"toilet_bowl:{year}")
@@ -1,145 +1,370 @@
 import json
-import pandas as pd
+from contextlib import contextmanager
 from flask import current_app
-from datetime import datetime, timedelta
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
+from helpers.bracket_helper import build_bracket, tournament_bracket
+from helpers.schedule_helper import (
+    fetch_schedule_page,
+    parse_schedule_page,
+    round_at,
+    schedule_weeks,
+    season_timeline,
+)
 
 
-def import_schedule(year, db, Schedule):
-    url = f"https://www.pro-football-reference.com/years/{year}/games.htm"
+@contextmanager
+def unit_of_work(db):
+    """
+    Apply the writes made in the block as one transaction: committed once at the
+    end, or rolled back as a whole if the block raises.
 
-    df = df = pd.read_html(url)[0]
-    df = df.copy()
+    Args:
+        db (SQLAlchemy): database object
+    """
+    try:
+        yield db.session
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
-    # Convert 'Week' column to numeric, errors='coerce' will set non-numeric values to NaN
-    df["Week"] = pd.to_numeric(df["Week"], errors="coerce")
 
-    # Drop rows where 'Week' is NaN (non-integer weeks)
-    df = df.dropna(subset=["Week"])
+def bulk_upsert(db, Model, rows, key, update=(), batch_size=500):
+    """
+    Insert the rows that don't exist yet and update the given columns of the ones
+    that do, matching rows on their key columns.
 
-    # Convert 'Date' and 'Time' columns to datetime objects for accurate comparison
-    df["DateTime"] = pd.to_datetime(
-        df["Date"] + " " + df["Time"], format="%Y-%m-%d %I:%M%p"
-    )
+    The existing rows of each batch are loaded with one IN query on the key, so a
+    batch costs one read plus the batched INSERT and UPDATE statements of the
+    flush, whatever its size. Rows go through the session, so the season version
+    listeners see them. Nothing is committed.
 
-    # Filtering the DataFrame to include only weeks 15, 16, and 17
-    df_filtered = df[df["Week"].isin([15, 16, 17])]
+    Args:
+        db (SQLAlchemy): database object
+        Model (Model): model of the rows
+        rows (list): dicts of column values, each holding the key columns
+        key (tuple): names of the columns identifying a row
+        update (tuple, optional): columns to overwrite on existing rows. Defaults
+            to none, which only inserts missing rows.
+        batch_size (int, optional): rows per IN query. Defaults to 500.
 
-    # Finding the earliest and latest games for weeks 15, 16, and 17
-    selected_weeks_earliest_and_latest = (
-        df_filtered.groupby("Week")["DateTime"].agg(["min", "max"]).reset_index()
-    )
+    Returns:
+        dict: "inserted" and "updated" model objects, and "existing" objects
+        matched but left unchanged
+    """
+    result = {"inserted": [], "updated": [], "existing": []}
+    key_columns = [getattr(Model, column) for column in key]
 
-    selected_weeks_earliest_and_latest["min"] = pd.to_datetime(
-        selected_weeks_earliest_and_latest["min"]
-    )
+    # Later duplicates of a key are ignored
+    unique_rows = {}
+    for row in rows:
+        unique_rows.setdefault(tuple(row[column] for column in key), row)
+    items = list(unique_rows.items())
 
-    # Function to find the previous Tuesday at 00:01 for a given datetime
-    def get_previous_tuesday(date):
-        # Calculate the number of days to subtract to get to the previous Tuesday
-        days_to_subtract = (date.weekday() - 1) % 7
-        if days_to_subtract == 0:  # If today is Tuesday, go back a full week
-            days_to_subtract = 7
-        previous_tuesday = date - pd.Timedelta(days=days_to_subtract)
-        # Set the time to 00:01
-        previous_tuesday = previous_tuesday.replace(
-            hour=0, minute=1, second=0, microsecond=0
-        )
-        return previous_tuesday
-
-    # Apply the function
-    selected_weeks_earliest_and_latest[
-        "week_start"
-    ] = selected_weeks_earliest_and_latest["min"].apply(get_previous_tuesday)
-
-    for index, row in selected_weeks_earliest_and_latest.iterrows():
-        schedule = Schedule.query.filter_by(year=year, week=row["Week"]).first()
-        if schedule is None:
-            new_schedule = Schedule(
-                year=year,
-                week=int(row["Week"]),
-                early_game_date_time=row["min"].isoformat(),
-                late_game_date_time=row["max"].isoformat(),
-                week_start=row["week_start"].isoformat(),
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        keys = [row_key for row_key, row in batch]
+        # Each column is matched on its own as well so the planner can use the
+        # key's index (SQLite scans the table for a row value IN list alone)
+        existing = {
+            tuple(getattr(obj, column) for column in key): obj
+            for obj in db.session.query(Model).filter(
+                tuple_(*key_columns).in_(keys),
+                *(
+                    column.in_({row_key[i] for row_key in keys})
+                    for i, column in enumerate(key_columns)
+                ),
             )
-            db.session.add(new_schedule)
-            db.session.commit()  # Commit for each schedule entry
-            current_app.logger.info(f"Week {row['Week']} of {year} added.")
-        else:
+        }
+        for row_key, row in batch:
+            obj = existing.get(row_key)
+            if obj is None:
+                obj = Model(**row)
+                db.session.add(obj)
+                result["inserted"].append(obj)
+                continue
+
+            changed = False
+            for column in update:
+                if getattr(obj, column) != row[column]:
+                    setattr(obj, column, row[column])
+                    changed = True
+            result["updated" if changed else "existing"].append(obj)
+        # Write the batch before loading the next one
+        db.session.flush()
+    return result
+
+
+def import_schedule(year, db, Schedule, Tournament, refresh=False, weeks=None):
+    """
+    Import the first and last kickoff of the tournament weeks of a year from the
+    pro-football-reference schedule page, cached on disk so re-imports run offline.
+
+    Args:
+        year (int): NFL season
+        db (SQLAlchemy): database object
+        Schedule (Schedule): Schedule model
+        Tournament (Tournament): Tournament model
+        refresh (bool, optional): download the schedule page again. Defaults to False.
+        weeks (iterable, optional): weeks to import. Defaults to the weeks of the
+            season's bracket (see get_season_bracket).
+    """
+    if weeks is None:
+        bracket = get_season_bracket(year, db, Tournament)
+        weeks = range(bracket["start_week"], bracket["final_week"] + 1)
+    path = fetch_schedule_page(
+        year, current_app.config["SCHEDULE_CACHE_PATH"], refresh=refresh
+    )
+    rows = [
+        {
+            "year": year,
+            "week": int(week.week),
+            "early_game_date_time": week.early.to_pydatetime(),
+            "late_game_date_time": week.late.to_pydatetime(),
+            "week_start": week.week_start.to_pydatetime(),
+        }
+        for week in schedule_weeks(parse_schedule_page(path), weeks).itertuples()
+    ]
+
+    with unit_of_work(db):
+        result = bulk_upsert(db, Schedule, rows, key=("year", "week"))
+
+        for schedule in result["inserted"]:
+            current_app.logger.info(f"Week {schedule.week} of {year} added.")
+        for schedule in result["existing"]:
             current_app.logger.warning(
-                f"Week {row['Week']} of {year} already exists. Skipping..."
+                f"Week {schedule.week} of {year} already exists. Skipping..."
             )
 
 
-def return_week_dates(year, db, Schedule):
-    # Example query to retrieve the schedule
-    schedule = Schedule.query.filter_by(year=year).all()
+def format_schedule_week(schedule_week):
+    """
+    Format a Schedule row for display.
+
+    Args:
+        schedule_week (Schedule): schedule row for a single week
+
+    Returns:
+        dict: week, year, display dates of the early and late games and the week start
+    """
+    return {
+        "week": schedule_week.week,
+        "year": schedule_week.year,
+        "early_game": schedule_week.early_game_date_time.strftime("%b %d"),
+        "late_game": schedule_week.late_game_date_time.strftime("%b %d"),
+        "week_start": schedule_week.week_start,
+        "early_game_date_time": schedule_week.early_game_date_time,
+        "late_game_date_time": schedule_week.late_game_date_time,
+    }
+
+
+def format_bracket_game(game):
+    """
+    Flatten a Game and its eagerly loaded teams into a dictionary for display.
+
+    Args:
+        game (Game): game with its team1 and team2 relationships loaded
+
+    Returns:
+        dict: game details with team names ("TBD" when a slot is still open)
+    """
+    return {
+        "id": game.id,
+        "year": game.year,
+        "week": game.week,
+        "round": game.round,
+        "status": game.status,
+        "team1_id": game.team1_id,
+        "team1_name": game.team1.name if game.team1 is not None else "TBD",
+        "team1_seed": game.team1_seed,
+        "team1_score": game.team1_score,
+        "team2_id": game.team2_id,
+        "team2_name": game.team2.name if game.team2 is not None else "TBD",
+        "team2_seed": game.team2_seed,
+        "team2_score": game.team2_score,
+        "winner_team_id": game.winner_team_id,
+        "loser_team_id": game.loser_team_id,
+    }
+
+
+def get_season_bracket(year, db, Tournament):
+    """
+    Bracket definition of a season, in the shape stored when its tournament was
+    populated. A season not populated yet gets the bracket of a
+    TOURNAMENT_LEAGUE_SIZE-team league shaped by the TOURNAMENT_* config.
+
+    Args:
+        year (int): season
+        db (SQLAlchemy): database object
+        Tournament (Tournament): Tournament model
+
+    Returns:
+        dict: bracket definition
+    """
+    tournament = db.session.get(Tournament, year)
+    if tournament is not None:
+        return tournament_bracket(tournament)
+    return build_bracket(
+        current_app.config["TOURNAMENT_LEAGUE_SIZE"],
+        current_app.config["TOURNAMENT_TEAMS"] or None,
+        current_app.config["TOURNAMENT_FINAL_WEEK"],
+    )
+
+
+def get_bracket_years(db, Tournament):
+    """
+    Years that have a bracket, in order. Every season with games has a
+    Tournament row, so this reads its small primary key instead of scanning the
+    games.
+    """
+    return [
+        y[0] for y in db.session.query(Tournament.year).order_by(Tournament.year).all()
+    ]
+
+
+def load_bracket(year, db, Game, Schedule, Tournament):
+    """
+    Load the Toilet Bowl bracket for a year in a fixed number of queries.
+
+    Games are fetched together with both teams through the Game.team1 and
+    Game.team2 relationships, so the number of queries does not grow with the
+    number of games: one for the available years, one for the bracket shape, one
+    for the games and their teams and one for the schedule.
+
+    Args:
+        year (int): year of the bracket to load
+        db (SQLAlchemy): database object
+        Game (Game): Game model
+        Schedule (Schedule): Schedule model
+        Tournament (Tournament): Tournament model
+
+    Returns:
+        dict: year, years with games, formatted schedule and the rounds of the bracket,
+        each with its schedule dates and its games already grouped
+    """
+    years = get_bracket_years(db, Tournament)
+
+    games = (
+        Game.query.options(joinedload(Game.team1), joinedload(Game.team2))
+        .filter_by(year=year)
+        .order_by(Game.round, Game.id)
+        .all()
+    )
+
+    schedule = [
+        format_schedule_week(schedule_week)
+        for schedule_week in Schedule.query.filter_by(year=year)
+        .order_by(Schedule.week)
+        .all()
+    ]
+    schedule_by_week = {week["week"]: week for week in schedule}
 
-    formatted_schedule = []
+    # Every round of the bracket exists so the template can lay out the full
+    # bracket before every game has been created.
+    bracket = get_season_bracket(year, db, Tournament)
+    rounds = {
+        round_number: {
+            "round": round_number,
+            "week": bracket["start_week"] + round_number - 1,
+            "games": [],
+        }
+        for round_number in range(1, bracket["rounds"] + 1)
+    }
+    for game in games:
+        round_data = rounds.setdefault(game.round, {"round": game.round, "games": []})
+        round_data["week"] = game.week
+        round_data["games"].append(format_bracket_game(game))
+
+    for round_data in rounds.values():
+        scheduled_week = schedule_by_week.get(round_data["week"], {})
+        round_data["early_game"] = scheduled_week.get("early_game")
+        round_data["late_game"] = scheduled_week.get("late_game")
+        round_data["early_game_date_time"] = scheduled_week.get("early_game_date_time")
+        round_data["late_game_date_time"] = scheduled_week.get("late_game_date_time")
+        round_data["completed"] = bool(round_data["games"]) and all(
+            game["status"] == "Completed" for game in round_data["games"]
+        )
+
+    return {
+        "year": year,
+        "years": years,
+        "schedule": schedule,
+        "rounds": [rounds[round_number] for round_number in sorted(rounds)],
+    }
 
-    for game in schedule:
-        # Convert the string to a datetime object
-        early_game_time = datetime.fromisoformat(game.early_game_date_time)
-        late_game_time = datetime.fromisoformat(game.late_game_date_time)
-        week_start = datetime.fromisoformat(game.week_start)
 
-        # Format the datetime object
-        early_formatted_time = early_game_time.strftime("%b %d")
-        late_formatted_time = late_game_time.strftime("%b %d")
-        week_start_formatted_time = week_start.strftime("%m/%d/%Y %H:%M:%S")
+def bracket_snapshot(bracket, version):
+    """
+    Reduce a loaded bracket to the data published by the JSON API and rendered by
+    the bracket page.
 
-        formatted_schedule.append(
+    Args:
+        bracket (dict): bracket returned by load_bracket
+        version (int): season data version the bracket was loaded at
+
+    Returns:
+        dict: year, version and rounds with their week date range and games
+    """
+    return {
+        "year": bracket["year"],
+        "version": version,
+        "rounds": [
             {
-                "week": game.week,
-                "year": game.year,
-                "early_game": early_formatted_time,
-                "late_game": late_formatted_time,
-                "week_start": week_start,
+                "round": round_data["round"],
+                "week": round_data["week"],
+                "early_game": round_data["early_game"],
+                "late_game": round_data["late_game"],
+                "early_game_date_time": round_data["early_game_date_time"],
+                "late_game_date_time": round_data["late_game_date_time"],
+                "completed": round_data["completed"],
+                "games": [
+                    {key: value for key, value in game.items() if key != "year"}
+                    for game in round_data["games"]
+                ],
             }
-        )
-    return formatted_schedule
+            for round_data in bracket["rounds"]
+        ],
+    }
 
 
-def get_current_round(scheduled_game):  # year was old argument
-    try:
-        # league = self.espn_api_call()
-        # if self.league is not None:
-        if scheduled_game is not None:
-            if scheduled_game["year"] == datetime.now().year:
-                today = datetime.now()
-                week = scheduled_game["week_start"]
-                one_week_out = week + timedelta(weeks=1)
-                two_weeks_out = week + timedelta(weeks=2)
-                if week <= today:
-                    round = 1
-                if today <= one_week_out:
-                    round = 2
-                if today <= two_weeks_out:
-                    round = 3
-            else:
-                round = 3
-        return round
-    except Exception as e:
-        current_app.logger.error(f"Unable to fetch current round. {e}")
-        return
+def get_season_round(year, version, Schedule, now=None):
+    """
+    Determine the playoff round to highlight for a year: the last round whose week
+    has started, from the season's cached round timeline.
+
+    Args:
+        year (int): year of the bracket
+        version (int): current season version
+        Schedule (Schedule): Schedule model
+        now (datetime, optional): time to look up. Defaults to now.
+
+    Returns:
+        int: current round, or None if the year has no schedule
+    """
+    timeline = season_timeline(year, version, Schedule)
+    return round_at(timeline, now or datetime.now())
 
 
 def import_owners(file_path, db, Owner):
     with open(file_path, "r") as file:
         owners_data = json.load(file)
 
-    for owner_data in owners_data:
-        sid = owner_data["fields"]["sid"]
-        owner_name = owner_data["fields"]["name"]
-        owner = Owner.query.filter_by(espn_id=sid).first()
-        if owner is None:
-            new_owner = Owner(
-                espn_id=owner_data["fields"]["sid"],
-                name=owner_data["fields"]["name"],
-                email=owner_data["fields"]["email"],
-                phone=owner_data["fields"]["phone"],
-            )
-            db.session.add(new_owner)
-            current_app.logger.info(f"{new_owner.name} added.")
-        else:
-            current_app.logger.warning(f"{owner_name} already exists. Skipping...")
-    db.session.commit()
+    rows = [
+        {
+            "espn_id": owner_data["fields"]["sid"],
+            "name": owner_data["fields"]["name"],
+            "email": owner_data["fields"]["email"],
+            "phone": owner_data["fields"]["phone"],
+        }
+        for owner_data in owners_data
+    ]
+
+    with unit_of_work(db):
+        result = bulk_upsert(db, Owner, rows, key=("espn_id",))
+
+        for owner in result["inserted"]:
+            current_app.logger.info(f"{owner.name} added.")
+        for owner in result["existing"]:
+            current_app.logger.warning(f"{owner.name} already exists. Skipping...")
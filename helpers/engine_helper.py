@@ -0,0 +1,119 @@
+from functools import wraps
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Bind key of the optional read-only engine
+READ_BIND = "read"
+
+
+def engine_options(config):
+    """
+    Engine options for every engine of the app, from the DATABASE_* config.
+    Pool sizes only apply to server databases; SQLite file databases keep
+    SQLAlchemy's default pool.
+
+    Args:
+        config (dict): app config
+
+    Returns:
+        dict: SQLALCHEMY_ENGINE_OPTIONS
+    """
+    options = {
+        "pool_pre_ping": config["DATABASE_POOL_PRE_PING"],
+        "pool_recycle": config["DATABASE_POOL_RECYCLE"],
+    }
+    if not (config["SQLALCHEMY_DATABASE_URI"] or "").startswith("sqlite"):
+        options["pool_size"] = config["DATABASE_POOL_SIZE"]
+        options["max_overflow"] = config["DATABASE_MAX_OVERFLOW"]
+    return options
+
+
+def database_binds(config):
+    """
+    SQLALCHEMY_BINDS with the read-only engine, if DATABASE_READ_URL is set.
+    """
+    if not config["DATABASE_READ_URL"]:
+        return {}
+    return {READ_BIND: config["DATABASE_READ_URL"]}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends every statement to the read-only engine once marked with
+    session.info["read_only"], and to the model's engine otherwise.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get("read_only"):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """
+    Run a view's queries on the read-only engine, when there is one, so page
+    views never wait on the poller's write transactions.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        session = current_app.extensions["sqlalchemy"].session
+        session.info["read_only"] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            session.info.pop("read_only", None)
+
+    return wrapper
+
+
+def sqlite_pragmas(config, read_only=False):
+    """
+    PRAGMAs run on every new SQLite connection. The journal mode is persistent
+    and only set by writers.
+    """
+    pragmas = [
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas.insert(0, f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+    return pragmas
+
+
+def init_engines(app, db):
+    """
+    Set up every connection the app's engines open: the SQLite PRAGMAs, and
+    read-only transactions on a Postgres read engine. Each pooled connection
+    pays for this once.
+    """
+    with app.app_context():
+        engines = dict(db.engines)
+    for key, engine in engines.items():
+        if engine.dialect.name == "sqlite":
+            statements = sqlite_pragmas(app.config, read_only=key == READ_BIND)
+        elif engine.dialect.name == "postgresql" and key == READ_BIND:
+            statements = ["SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY"]
+        else:
+            continue
+
+        def on_connect(
+            dbapi_connection,
+            connection_record,
+            statements=statements,
+            commit=engine.dialect.name != "sqlite",
+        ):
+            cursor = dbapi_connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.close()
+            if commit:
+                dbapi_connection.commit()
+
+        event.listen(engine, "connect", on_connect)
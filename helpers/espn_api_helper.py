@@ -1,9 +1,28 @@
 from espn_api.requests.espn_requests import ESPNAccessDenied, ESPNInvalidLeague
 from espn_api.football import League
 from flask import current_app
-from models import db, Team, Owner, Game
+from helpers.bracket_helper import (
+    add_bracket_games,
+    bracket_seeds,
+    build_bracket,
+    check_bracket,
+    evaluate_bracket,
+)
+from helpers.cache_helper import invalidate_bracket
+from helpers.db_helper import bulk_upsert, get_season_bracket, unit_of_work
+from helpers.espn_cache_helper import CachedEspnFantasyRequests, get_espn_cache
+from helpers.espn_fixture_helper import FixtureRecorder
+from helpers.espn_slim_helper import SlimLeague
+from helpers.http_helper import get_espn_session
+from helpers.stream_helper import notify_bracket_change
+from models import db, Team, Owner, Game, SeasonVersion, Tournament
 from datetime import datetime
 from sqlalchemy.orm import aliased
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import hashlib
+import orjson
+import time
 import traceback
 
 
@@ -13,38 +32,85 @@ class ESPNAPIHelper:
         self.espn_s2 = current_app.config["ESPN_S2"]
         self.swid = current_app.config["SWID"]
         self.year = year
+        self.box_score_indexes = {}
 
-    def espn_api_call(self):
+    def espn_request(self):
+        """
+        Creates the ESPN request layer for the league, reading through the response
+        cache and the shared ESPN session.
+        """
+        cookies = None
+        if self.espn_s2 and self.swid:
+            cookies = {"espn_s2": self.espn_s2, "SWID": self.swid}
+
+        recorder = None
+        if current_app.config["ESPN_RECORD_PATH"]:
+            recorder = FixtureRecorder(current_app.config["ESPN_RECORD_PATH"])
+
+        return CachedEspnFantasyRequests(
+            get_espn_cache(),
+            get_espn_session(),
+            year=self.year,
+            league_id=self.league_id,
+            cookies=cookies,
+            base_url=current_app.config["ESPN_BASE_URL"],
+            recorder=recorder,
+        )
+
+    def espn_api_call(self, slim=False):
         """
         Makes and API call to the ESPN Fantasy Football API
 
         Keyword arguments:
         year - Year to pull league data
+        slim - Only fetch teams, owners and matchup scores instead of building the full League
 
         Return: Object containing all relevant league/player data for the year provided
         """
 
         try:
-            self.league = League(
-                league_id=self.league_id,
-                year=self.year,
-                espn_s2=self.espn_s2,
-                swid=self.swid,
-            )
+            if slim:
+                self.league = SlimLeague(self.espn_request(), self.league_id, self.year)
+            else:
+                self.league = League(
+                    league_id=self.league_id,
+                    year=self.year,
+                    espn_s2=self.espn_s2,
+                    swid=self.swid,
+                    fetch_league=False,
+                )
+                # Read every request, including later box scores, through the response cache
+                self.league.espn_request = self.espn_request()
+                self.league.fetch_league()
         except (ESPNInvalidLeague, ESPNAccessDenied, Exception) as e:
             self.league = None
             current_app.logger.error(f"Failed to fetch league data: {e}")
 
         return self.league
 
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Apply the writes made in the block as one transaction, committed once or
+        rolled back as a whole on error. If the season changed, the cached bracket
+        pages are dropped and the live score stream is woken.
+        """
+        version = self.season_version()
+        with unit_of_work(db):
+            yield
+        if self.season_version() != version:
+            # A new season changes the years offered on every bracket page
+            invalidate_bracket(None if version == 0 else self.year)
+            notify_bracket_change()
+
     def update_teams(self):
         """
         Update the Team table with the current year's team information from the ESPN API.
         """
 
-        # Fetch league data
+        # Fetch league data (team names and owners only)
         try:
-            league = self.espn_api_call()
+            league = self.espn_api_call(slim=True)
         except Exception as e:
             current_app.logger.error(f"Error fetching league data: {e}")
             return
@@ -55,27 +121,34 @@ class ESPNAPIHelper:
             )
             return
 
+        # Find the owners of every team in one query
+        owner_sids = {}
+        for api_team in league.teams:
+            owner_sid = self.extract_owner_sid(api_team)
+            if owner_sid is not None:
+                owner_sids[api_team.team_id] = owner_sid
+        owners = {
+            owner.espn_id: owner
+            for owner in Owner.query.filter(Owner.espn_id.in_(owner_sids.values()))
+        }
+
+        team_owners = []
         for api_team in league.teams:
-            # Process each team
-            try:
-                # Extract owner_sid
-                owner_sid = self.extract_owner_sid(api_team)
-                if owner_sid is None:
-                    continue
-
-                # Find the owner in the Owner table by sid
-                owner = Owner.query.filter_by(espn_id=owner_sid).first()
-                if owner is None:
-                    current_app.logger.error(f"No owner found with sid: {owner_sid}")
-                    continue
-
-                # Update Team table
-                self.update_or_add_team(api_team, owner)
-
-            except Exception as e:
+            if api_team.team_id not in owner_sids:
+                continue
+            owner = owners.get(owner_sids[api_team.team_id])
+            if owner is None:
                 current_app.logger.error(
-                    f"Error processing team {api_team.team_name}: {e}"
+                    f"No owner found with sid: {owner_sids[api_team.team_id]}"
                 )
+                continue
+            team_owners.append((api_team, owner))
+
+        try:
+            with self.unit_of_work():
+                self.update_or_add_teams(team_owners)
+        except Exception as e:
+            current_app.logger.error(f"Error updating teams, no changes saved: {e}")
 
     def extract_owner_sid(self, api_team):
         """
@@ -97,33 +170,29 @@ class ESPNAPIHelper:
             )
             return None
 
-    def update_or_add_team(self, api_team, owner):
-        """
-        Updates an existing team or adds a new team to the database.
+    def update_or_add_teams(self, team_owners):
         """
+        Updates existing teams and adds new teams in one batch. Nothing is
+        committed; update_teams commits every team together.
 
-        try:
-            team = Team.query.filter_by(owner_id=owner.espn_id, year=self.year).first()
-            if team is None:
-                team = Team(
-                    owner_id=owner.espn_id,
-                    year=self.year,
-                    name=api_team.team_name,
-                    espn_team_id=api_team.team_id,
-                )
-                db.session.add(team)
-                db.session.commit()
-                current_app.logger.info(f"Added new team: {team.name} for {self.year}")
-            elif team.name != api_team.team_name:
-                team.name = api_team.team_name
-                db.session.commit()
-                current_app.logger.info(
-                    f"Updated team name: {team.name} for {self.year}"
-                )
-        except Exception as e:
-            current_app.logger.error(
-                f"Error updating/adding team for owner {owner.name}: {e}"
-            )
+        Args:
+            team_owners (list): (ESPN team, Owner) pairs
+        """
+        rows = [
+            {
+                "owner_id": owner.espn_id,
+                "year": self.year,
+                "name": api_team.team_name,
+                "espn_team_id": api_team.team_id,
+            }
+            for api_team, owner in team_owners
+        ]
+        result = bulk_upsert(db, Team, rows, key=("owner_id", "year"), update=("name",))
+
+        for team in result["inserted"]:
+            current_app.logger.info(f"Added new team: {team.name} for {self.year}")
+        for team in result["updated"]:
+            current_app.logger.info(f"Updated team name: {team.name} for {self.year}")
 
     def get_league_standings(self, league, week=None):
         """
@@ -158,117 +227,100 @@ class ESPNAPIHelper:
             return
 
     def populate_tournament(self):
-        # Setting week to 14 to get standings for previous years
-        week = 14
-
         try:
             league = self.espn_api_call()
+            bracket = self.season_bracket(len(league.teams))
+            # Standings after the last week of the regular season
+            week = bracket["start_week"] - 1
             if league.year == datetime.now().year:
-                if league.current_week <= 14:  # Last week of the regular season
+                if league.current_week <= week:
                     current_app.logger.info("League is still in the regular season.")
                     return
 
             league_standings = self.get_league_standings(league, week)
 
             if league_standings:
-                # Fetch and store team IDs for seeds 7 through 12
-                team_ids_for_seeds = {}
-                for index, team in enumerate(league_standings["standings"], start=1):
-                    if 7 <= index <= 12:
-                        db_team = Team.query.filter_by(
-                            name=team.team_name, year=self.year
-                        ).first()
-                        if db_team:
-                            team_ids_for_seeds[index] = db_team.id
-                        else:
-                            current_app.logger.warning(
-                                f"Team '{team.team_name}' for year {self.year} not found in database."
-                            )
-                # Create games for round 1 (seeds 7 vs 10 and 8 vs 9)
-                for match in [(7, 10), (8, 9)]:
-                    team1_id = team_ids_for_seeds.get(match[0])
-                    team2_id = team_ids_for_seeds.get(match[1])
-                    if team1_id and team2_id:
-                        game = Game.query.filter_by(
+                with self.unit_of_work():
+                    db.session.merge(
+                        Tournament(
                             year=self.year,
-                            week=week + 1,
-                            round=1,
-                            team1_id=team1_id,
-                            team2_id=team2_id,
-                        ).first()
-                        if game is None:
-                            game = Game(
-                                year=self.year,
-                                week=week + 1,
-                                round=1,
-                                team1_id=team1_id,
-                                team1_seed=match[0],
-                                team2_id=team2_id,
-                                team2_seed=match[1],
-                                status="Scheduled",
-                            )
-                            db.session.add(game)
-                            current_app.logger.info(
-                                f"Added new game: Seeds {match[0]} vs. {match[1]} for {self.year}"
-                            )
-                        else:
-                            current_app.logger.info(
-                                f"Game {match[0]} vs. {match[1]} for {self.year} already exists. Skipping..."
-                            )
-
-                # Create placeholder games for round 2 with seeds 11 and 12
-                for seed in [11, 12]:
-                    team_id = team_ids_for_seeds.get(seed)
-                    if team_id:
-                        game = Game.query.filter_by(
-                            year=self.year, week=week + 2, round=2, team1_id=team_id
-                        ).first()
-
-                        if game is None:
-                            game = Game(
-                                year=self.year,
-                                week=week + 2,
-                                round=2,
-                                team1_id=team_id,
-                                team1_seed=seed,
-                                status="Pending",
-                            )
-                            db.session.add(game)
-                            current_app.logger.info(
-                                f"Added placeholder game for Seed {seed} in Round 2 for {self.year}"
-                            )
-                        else:
-                            current_app.logger.info(
-                                f"Placeholder game for Seed {seed} in Round 2 for {self.year} already exists. Skipping..."
-                            )
-
-                # Create placeholder game for the Toilet Bowl Championship
-                game = Game.query.filter_by(
-                    year=self.year, week=week + 3, round=3
-                ).first()
-                if game is None:
-                    game = Game(
-                        year=self.year,
-                        week=week + 3,
-                        round=3,
-                        status="Pending",
-                    )
-                    db.session.add(game)
-                    current_app.logger.info(
-                        f"Added championship placeholder game for Round 2 for {self.year}. Teams TBA"
-                    )
-                else:
-                    current_app.logger.info(
-                        f"Championship placeholder game for {self.year} already exists. Skipping..."
+                            league_size=bracket["league_size"],
+                            bracket_size=bracket["bracket_size"],
+                            final_week=bracket["final_week"],
+                        )
                     )
-
-                db.session.commit()
+                    self.add_tournament_games(league_standings["standings"], bracket)
 
         except Exception as e:
             tb = traceback.format_exc()
             current_app.logger.exception(f"Error populating tournament: {e}\n{tb}")
             return
 
+    def season_bracket(self, league_size=None, games=None):
+        """
+        Bracket definition for the season.
+
+        Populating a season shapes its bracket from the league size and the
+        TOURNAMENT_* config; afterwards the shape stored then is used, so teams
+        missing from the Team table or later config changes can't alter it. Any
+        games already stored are checked against the bracket.
+
+        Args:
+            league_size (int, optional): number of teams in the league, from ESPN,
+                when populating. Defaults to the season's stored shape.
+            games (list, optional): Game rows of the season. Defaults to loading them.
+
+        Returns:
+            dict: bracket definition
+
+        Raises:
+            ValueError: if the stored games don't fit the bracket
+        """
+        if games is None:
+            games = Game.query.filter_by(year=self.year).all()
+
+        if league_size is None:
+            bracket = get_season_bracket(self.year, db, Tournament)
+        else:
+            bracket = build_bracket(
+                league_size,
+                current_app.config["TOURNAMENT_TEAMS"] or None,
+                current_app.config["TOURNAMENT_FINAL_WEEK"],
+            )
+        check_bracket(bracket, games)
+        return bracket
+
+    def add_tournament_games(self, standings, bracket):
+        """
+        Add the games of the season's bracket that don't exist yet.
+
+        Args:
+            standings (list): ESPN teams in standings order
+            bracket (dict): bracket definition from season_bracket
+        """
+        seeds = set(bracket_seeds(bracket))
+        seed_names = {
+            index: team.team_name
+            for index, team in enumerate(standings, start=1)
+            if index in seeds
+        }
+        result = add_bracket_games(
+            db.session, Game, Team, self.year, bracket, seed_names
+        )
+
+        for name in result["missing"]:
+            current_app.logger.warning(
+                f"Team '{name}' for year {self.year} not found in database."
+            )
+        for game in result["inserted"]:
+            current_app.logger.info(
+                f"Added round {game.round} game: Seeds {game.team1_seed} vs. {game.team2_seed} for {self.year}"
+            )
+        for game in result["existing"]:
+            current_app.logger.info(
+                f"Round {game.round} game: Seeds {game.team1_seed} vs. {game.team2_seed} for {self.year} already exists. Skipping..."
+            )
+
     def get_tb_teams(self):
         try:
             """
@@ -323,23 +375,43 @@ class ESPNAPIHelper:
             )
             return
 
-    def update_game_results(self, league, week):
+    def update_game_results(self, league, week, commit=True):
         """
-        Update the toilet bowl game results for the given weeks.
+        Update the toilet bowl game results for the given week. When a Completed
+        game changes, the bracket is advanced straight away (see advance_bracket).
 
         Args:
-            weeks_to_update (list): List of weeks to update results.
+            league (obj): ESPN FF API league object
+            week (int): week to update results
+            commit (bool, optional): commit the changes of the week as one
+                transaction. Defaults to True; with False the caller commits.
 
         Returns:
-            None
+            bool: True if any game was updated
         """
+        if commit:
+            with self.unit_of_work():
+                return self.update_game_results(league, week, commit=False)
+
         try:
             self.league = league
             if self.league is not None:
                 team_id_to_team = {team.team_id: team for team in self.league.teams}
                 current_week = self.league.nfl_week
+                updated = False
+                bracket_changed = False
+
+                # Every game of the week in one query
+                week_games = {}
+                for game in Game.query.filter_by(year=self.year, week=week).order_by(
+                    Game.id
+                ):
+                    week_games.setdefault(game.team1_id, game)
 
                 for tb_team in self.get_tb_teams():
+                    # Only the games of the week share its box scores
+                    if tb_team["week"] != week:
+                        continue
                     if (
                         tb_team["team1_espn_team_id"]
                         and tb_team["team1_espn_team_id"] is not None
@@ -363,34 +435,20 @@ class ESPNAPIHelper:
                                 continue
 
                             try:
-                                for boxscore in self.league.box_scores(week):
-                                    if boxscore.home_team != 0:
-                                        if (
-                                            boxscore.home_team.team_id
-                                            == tb_team["team1_espn_team_id"]
-                                        ):
-                                            team_score_1 = int(boxscore.home_score)
-                                        elif (
-                                            boxscore.home_team.team_id
-                                            == tb_team["team2_espn_team_id"]
-                                        ):
-                                            team_score_2 = int(boxscore.home_score)
-                                    if boxscore.away_team != 0:
-                                        if (
-                                            boxscore.away_team.team_id
-                                            == tb_team["team1_espn_team_id"]
-                                        ):
-                                            team_score_1 = int(boxscore.away_score)
-                                        elif (
-                                            boxscore.away_team.team_id
-                                            == tb_team["team2_espn_team_id"]
-                                        ):
-                                            team_score_2 = int(boxscore.away_score)
+                                box_scores = self.get_box_score_index(self.league, week)
                             except IndexError:
                                 current_app.logger.error(
                                     f"Index out of range for week {week}"
                                 )
                                 continue
+
+                            if espn_id_1 not in box_scores or espn_id_2 not in box_scores:
+                                current_app.logger.error(
+                                    f"Box score not found for week {week}"
+                                )
+                                continue
+                            team_score_1 = int(box_scores[espn_id_1][0])
+                            team_score_2 = int(box_scores[espn_id_2][0])
                             #current_app.logger.info(f"Team 1 Score: {team_score_1}")
                             #current_app.logger.info(f"Team 2 Score: {team_score_2}")
 
@@ -415,11 +473,7 @@ class ESPNAPIHelper:
                                     f"Team 2 Total Score: {team_score_2}"
                                 )
 
-                            game_1 = Game.query.filter_by(
-                                year=self.year,
-                                week=week,
-                                team1_id=tb_team["team1_id"],
-                            ).first()
+                            game_1 = week_games.get(tb_team["team1_id"])
 
                             if game_1 is None:
                                 current_app.logger.error("Game not found.")
@@ -445,7 +499,9 @@ class ESPNAPIHelper:
                                 game_1.team1_score = team_score_1
                                 game_1.team2_score = team_score_2
                                 game_1.status = status
-                                db.session.commit()
+                                updated = True
+                                if status == "Completed":
+                                    bracket_changed = True
                                 current_app.logger.info(
                                     f"Updated scores for {tb_team['team1_name']} and {tb_team['team2_name']} for {self.year} (Week {week})."
                                 )
@@ -453,147 +509,226 @@ class ESPNAPIHelper:
                                 current_app.logger.info(
                                     f"No changes for {tb_team['team1_name']} and {tb_team['team2_name']} for {self.year} (Week {week}). Skipping..."
                                 )
+
+                # Move the losers on in the same transaction as the results, before
+                # the next week is updated
+                if bracket_changed:
+                    try:
+                        self.advance_bracket()
+                    except ValueError as e:
+                        # Keep the results; update_tournament advances the bracket
+                        # once its games are fixed
+                        current_app.logger.error(
+                            f"Unable to advance the {self.year} bracket: {e}"
+                        )
+                return updated
         except Exception as e:
             tb = traceback.format_exc()
             current_app.logger.exception(f"Error updating game results: {e}\n{tb}")
-            return
+            # Let the caller roll back the whole unit of work
+            raise
 
-    def update_tournament(self, week):
-        # Get round games for the current week
-        round_games = Game.query.filter_by(
-            week=week, year=self.year, status="Completed"
-        )
+    def update_results(self, league, weeks, timings=None, fingerprints=None):
+        """
+        Update the toilet bowl game results for several weeks.
 
-        for game in round_games:
-            if game.loser_team_id is None:
-                if week == 15:
-                    # Determine the loser and their seed
-                    if game.team1_seed == 7 and game.team2_seed == 10:
-                        if game.team2_score > game.team1_score:
-                            loser_id = game.team1_id
-                            loser_seed = game.team1_seed
-                        else:
-                            loser_id = game.team2_id
-                            loser_seed = game.team2_seed
-                    elif game.team1_seed == 8 and game.team2_seed == 9:
-                        if game.team2_score > game.team1_score:
-                            loser_id = game.team1_id
-                            loser_seed = game.team1_seed
-                        else:
-                            loser_id = game.team2_id
-                            loser_seed = game.team2_seed
-
-                    current_app.logger.info(
-                        f"Round: {game.round} Loser ID: {loser_id}, Loser Seed: {loser_seed}"
-                    )
+        The box scores of all weeks are fetched concurrently, then the results are
+        written from this thread and committed together, or rolled back together
+        if any week fails.
 
-                    # Update the current game's loser_team_id
-                    game.loser_team_id = loser_id
-                    db.session.commit()
-
-                    # Update the next round games in week 16
-                    # if week == 15:
-                    if loser_seed in [7, 10]:
-                        next_round_game = Game.query.filter_by(
-                            week=16, year=self.year, team1_seed=11
-                        ).first()
-                        if next_round_game:
-                            current_app.logger.info(
-                                f"Next Round Opponent: {next_round_game.team1_id}"
-                            )
-                            next_round_game.team2_id = loser_id
-                            next_round_game.team2_seed = loser_seed
-                            next_round_game.status = "Scheduled"
-                            db.session.commit()
-                    elif loser_seed in [8, 9]:
-                        next_round_game = Game.query.filter_by(
-                            week=16, year=self.year, team1_seed=12
-                        ).first()
-                        if next_round_game:
-                            current_app.logger.info(
-                                f"Next Round Opponent: {next_round_game.team1_id}"
-                            )
-                            next_round_game.team2_id = loser_id
-                            next_round_game.team2_seed = loser_seed
-                            next_round_game.status = "Scheduled"
-                            db.session.commit()
-
-                elif week == 16:
-                    if game.team2_score > game.team1_score:
-                        loser_id = game.team1_id
-                        loser_seed = game.team1_seed
-                        winner_id = game.team2_id
-                        winner_seed = game.team2_seed
-                    else:
-                        loser_id = game.team2_id
-                        loser_seed = game.team2_seed
-                        winner_id = game.team1_id
-                        winner_seed = game.team1_seed
-
-                    current_app.logger.info(
-                        f"Round: {game.round} Loser ID: {loser_id}, Loser Seed: {loser_seed}\n"
-                        f"Round: {game.round} Winner ID: {winner_id}, Winner Seed: {winner_seed}"
-                    )
+        Args:
+            league (obj): ESPN FF API league object
+            weeks (list): weeks to update results
+            timings (dict, optional): filled with the seconds spent fetching box
+                scores ("box_scores") and writing results ("writes")
+            fingerprints (dict, optional): week fingerprints kept between calls.
+                Weeks whose fingerprint hasn't changed since the last call are
+                skipped without touching the database.
 
-                    # Update the current game's loser_team_id
-                    game.loser_team_id = loser_id
-                    db.session.commit()
+        Returns:
+            bool: whether any game result changed
+        """
+        timings = timings if timings is not None else {}
+        fingerprints = fingerprints if fingerprints is not None else {}
+
+        start = time.perf_counter()
+        self.prefetch_box_scores(league, weeks)
+        timings["box_scores"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        version = self.season_version()
+        changed_weeks = [
+            week
+            for week in weeks
+            if fingerprints.get((self.year, week)) is None
+            or fingerprints[(self.year, week)]
+            != self.week_fingerprint(league, week, version)
+        ]
+        skipped = sorted(set(weeks) - set(changed_weeks))
+        if skipped:
+            current_app.logger.debug(
+                f"Box scores unchanged for {self.year} weeks {skipped}. Skipping..."
+            )
 
-                    next_round_game = Game.query.filter_by(
-                        year=self.year, week=17
-                    ).first()
+        # Every week is written in one transaction; an error in any of them rolls
+        # back all of them and nothing is fingerprinted
+        updated = {}
+        if changed_weeks:
+            with self.unit_of_work():
+                updated = {
+                    week: self.update_game_results(league, week, commit=False)
+                    for week in changed_weeks
+                }
+        timings["writes"] = time.perf_counter() - start
+
+        # Fingerprint against the version after the writes, so the next call only
+        # skips a week if neither ESPN nor the bracket has moved since
+        version = self.season_version()
+        for week, result in updated.items():
+            if result is not None:
+                fingerprints[(self.year, week)] = self.week_fingerprint(
+                    league, week, version
+                )
+        return any(updated.values())
 
-                    if (
-                        next_round_game.team1_id is None
-                        or next_round_game.team2_id is None
-                    ):
-                        if loser_seed == 12 or winner_seed == 12:
-                            next_round_game.team2_id = loser_id
-                            next_round_game.team2_seed = loser_seed
-                        elif loser_seed == 11 or winner_seed == 11:
-                            next_round_game.team1_id = loser_id
-                            next_round_game.team1_seed = loser_seed
-                        next_round_game.status = "Scheduled"
-
-                        db.session.commit()
-
-                elif week == 17:
-                    if game.team2_score > game.team1_score:
-                        loser_id = game.team1_id
-                        loser_seed = game.team1_seed
-                        winner_id = game.team2_id
-                        winner_seed = game.team2_seed
-                    else:
-                        loser_id = game.team2_id
-                        loser_seed = game.team2_seed
-                        winner_id = game.team1_id
-                        winner_seed = game.team1_seed
-
-                    current_app.logger.info(
-                        f"Round: {game.round} Loser ID: {loser_id}, Loser Seed: {loser_seed}\n"
-                        f"Round: {game.round} Winner ID: {winner_id}, Winner Seed: {winner_seed}"
+    def season_version(self):
+        """
+        Current data version of the season, bumped whenever its games or teams change.
+        """
+        season = db.session.get(SeasonVersion, self.year)
+        return season.version if season else 0
+
+    def week_fingerprint(self, league, week, version):
+        """
+        Fingerprint of everything update_game_results reads for a week: the box
+        scores, ESPN's current week (which decides whether games are final) and the
+        season version.
+
+        Returns:
+            str: fingerprint, or None if the box scores could not be fetched
+        """
+        try:
+            box_scores = self.get_box_score_index(league, week)
+        except Exception:
+            return None
+        payload = [
+            league.nfl_week,
+            version,
+            sorted(
+                [team_id, score, lineup_total]
+                for team_id, (score, lineup, lineup_total) in box_scores.items()
+            ),
+        ]
+        return hashlib.sha1(orjson.dumps(payload)).hexdigest()
+
+    def update_tournament(self, commit=True):
+        """
+        Re-evaluate the season's bracket and write whatever changed.
+
+        Games are normally advanced by update_game_results as soon as they are
+        Completed; this full pass repairs a bracket after manual edits or
+        corrected scores.
+
+        Args:
+            commit (bool, optional): commit the changes as one transaction. Defaults
+                to True; with False the caller commits.
+
+        Returns:
+            list: (Game, changed column values) for each game that changed
+        """
+        if commit:
+            with self.unit_of_work():
+                return self.update_tournament(commit=False)
+        return self.advance_bracket()
+
+    def advance_bracket(self):
+        """
+        Load the season's games once, resolve the season's bracket and apply the
+        changed slots in one pass. Nothing is committed, so the moves are written
+        together with the results that caused them.
+
+        Returns:
+            list: (Game, changed column values) for each game that changed
+
+        Raises:
+            ValueError: if the stored games don't fit the season's bracket
+        """
+        games = Game.query.filter_by(year=self.year).all()
+        changes = evaluate_bracket(self.season_bracket(games=games), games)
+        for game, values in changes:
+            current_app.logger.info(
+                f"Round: {game.round} Week: {game.week} for {self.year}: {values}"
+            )
+            for column, value in values.items():
+                setattr(game, column, value)
+        return changes
+
+    def get_box_score_index(self, league, week):
+        """
+        Fetches the box scores of a week once per league and indexes them by team.
+
+        Args:
+            league (obj): ESPN FF API league object
+            week (int): week of the box scores
+
+        Returns:
+            dict: ESPN team id -> (score, lineup, points total of the whole lineup)
+        """
+        key = (league.league_id, week)
+        if key not in self.box_score_indexes:
+            index = {}
+            for boxscore in league.box_scores(week):
+                for team, score, lineup in (
+                    (boxscore.home_team, boxscore.home_score, boxscore.home_lineup),
+                    (boxscore.away_team, boxscore.away_score, boxscore.away_lineup),
+                ):
+                    # Teams on a bye are returned as 0
+                    if isinstance(team, int):
+                        continue
+                    lineup_total = sum(player.points for player in lineup)
+                    index[team.team_id] = (score, lineup, lineup_total)
+            self.box_score_indexes[key] = index
+        return self.box_score_indexes[key]
+
+    def prefetch_box_scores(self, league, weeks):
+        """
+        Fetches the box score indexes of several weeks concurrently on a bounded
+        thread pool, so the ESPN round trips of the weeks overlap.
+
+        Args:
+            league (obj): ESPN FF API league object
+            weeks (list): weeks to fetch
+        """
+        if league is None:
+            return
+        app = current_app._get_current_object()
+
+        def fetch(week):
+            with app.app_context():
+                try:
+                    self.get_box_score_index(league, week)
+                except Exception as e:
+                    # update_game_results retries the week and reports the error
+                    current_app.logger.warning(
+                        f"Unable to prefetch box scores for week {week}: {e}"
                     )
 
-                    # Update the current game's loser_team_id
-                    game.loser_team_id = loser_id
-                    db.session.commit()
+        with ThreadPoolExecutor(
+            max_workers=current_app.config["ESPN_MAX_WORKERS"]
+        ) as executor:
+            list(executor.map(fetch, weeks))
 
     def get_total_team_score(self, league, team_espn_team_id, week):
+        """
+        Total points of every player in a team's lineup, bench included, used to
+        break ties.
+        """
         try:
             if league is not None:
-                score = 0
-                boxscores = league.box_scores(week)
-                for bs in boxscores:
-                    if not isinstance(bs.home_team, int):
-                        if bs.home_team.team_id == team_espn_team_id:
-                            for player in bs.home_lineup:
-                                score += player.points
-                            return score
-                    if not isinstance(bs.away_team, int):
-                        if bs.away_team.team_id == team_espn_team_id:
-                            for player in bs.away_lineup:
-                                score += player.points
-                            return score
+                score, lineup, lineup_total = self.get_box_score_index(league, week)[
+                    team_espn_team_id
+                ]
+                return lineup_total
 
         except Exception as e:
             tb = traceback.format_exc()
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from espn_api.requests.constant import FANTASY_BASE_ENDPOINT
+from espn_api.requests.espn_requests import EspnFantasyRequests, checkRequestStatus
+from flask import current_app
+from urllib.parse import urlparse
+
+# Fetch locks shared by all keys. Keys that hash to the same lock only wait on
+# each other's fetches, and the number of locks stays fixed however many keys
+# are fetched.
+FETCH_LOCKS = 64
+
+
+class ESPNResponseCache:
+    """
+    On-disk cache of ESPN API responses, one JSON file per request.
+
+    Entries for final scoring periods never expire; everything else expires after
+    the live TTL. Threads asking for the same key while it is being fetched wait
+    for that fetch instead of calling ESPN again.
+    """
+
+    def __init__(self, directory, live_ttl):
+        self.directory = directory
+        self.live_ttl = live_ttl
+        self._locks = [threading.Lock() for _ in range(FETCH_LOCKS)]
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _digest(self, key):
+        return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, self._digest(key) + ".json")
+
+    def _lock(self, key):
+        return self._locks[int(self._digest(key), 16) % len(self._locks)]
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry["expires"] is not None and entry["expires"] < time.time():
+            return None
+        return entry["data"]
+
+    def set(self, key, data, immutable=False):
+        path = self._path(key)
+        expires = None if immutable else time.time() + self.live_ttl
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"key": key, "expires": expires, "data": data}, file)
+        os.replace(tmp_path, path)
+
+    def fetch(self, key, fetcher, is_immutable):
+        """
+        Return the cached response for a key, fetching and storing it on a miss.
+
+        Args:
+            key (list): cache key
+            fetcher (callable): makes the ESPN request and returns its JSON data
+            is_immutable (callable): given the data, tells whether it can never change
+
+        Returns:
+            dict | list: ESPN JSON data
+        """
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        with self._lock(key):
+            # Another thread may have fetched it while we waited
+            data = self.get(key)
+            if data is None:
+                data = fetcher()
+                self.set(key, data, is_immutable(data))
+        return data
+
+
+class CachedEspnFantasyRequests(EspnFantasyRequests):
+    """
+    espn_api request layer that reads through the ESPN response cache and sends
+    cache misses over the shared ESPN session.
+
+    Requests for a scoring period before the latest one, and every request of a
+    season that is no longer active, are final and cached permanently.
+
+    `base_url` sends the requests to another host, such as the local ESPN stand-in,
+    and `recorder` saves every response fetched as a replayable fixture.
+    """
+
+    def __init__(
+        self,
+        cache,
+        session,
+        year,
+        league_id,
+        cookies=None,
+        logger=None,
+        base_url=None,
+        recorder=None,
+    ):
+        super().__init__(
+            sport="nfl", year=year, league_id=league_id, cookies=cookies, logger=logger
+        )
+        self.cache = cache
+        self.session = session
+        self.recorder = recorder
+        if base_url:
+            # Keep the API path so fixtures match whichever host served them
+            base_endpoint = base_url.rstrip("/") + urlparse(FANTASY_BASE_ENDPOINT).path
+            self.ENDPOINT = self.ENDPOINT.replace(FANTASY_BASE_ENDPOINT, base_endpoint)
+            self.LEAGUE_ENDPOINT = self.LEAGUE_ENDPOINT.replace(
+                FANTASY_BASE_ENDPOINT, base_endpoint
+            )
+        self.latest_scoring_period = None
+        self.season_active = True
+
+    def _key(self, endpoint, params, headers, extend):
+        params = params or {}
+        return [
+            self.league_id,
+            self.year,
+            endpoint + extend,
+            params.get("scoringPeriodId"),
+            json.dumps(params, sort_keys=True),
+            json.dumps(headers or {}, sort_keys=True),
+        ]
+
+    def _track_status(self, data):
+        status = data.get("status") if isinstance(data, dict) else None
+        if status:
+            self.latest_scoring_period = status.get("latestScoringPeriod")
+            self.season_active = status.get("isActive", True)
+
+    def _is_final(self, params, data):
+        self._track_status(data)
+        if not self.season_active:
+            return True
+        scoring_period = (params or {}).get("scoringPeriodId")
+        return (
+            scoring_period is not None
+            and self.latest_scoring_period is not None
+            and scoring_period < self.latest_scoring_period
+        )
+
+    def _send(self, url, params, headers):
+        r = self.session.get(url, params=params, headers=headers, cookies=self.cookies)
+        if self.recorder is not None and r.status_code == 200:
+            self.recorder.record(url, params, headers, r.status_code, r.json())
+        return r
+
+    def _league_fetch(self, params, headers, extend):
+        r = self._send(self.LEAGUE_ENDPOINT + extend, params, headers)
+        checkRequestStatus(r.status_code, cookies=self.cookies, league_id=self.league_id)
+        return r.json() if self.year > 2017 else r.json()[0]
+
+    def _season_fetch(self, params, headers, extend):
+        r = self._send(self.ENDPOINT + extend, params, headers)
+        checkRequestStatus(r.status_code)
+        return r.json()
+
+    def league_get(self, params=None, headers=None, extend=""):
+        data = self.cache.fetch(
+            self._key("league", params, headers, extend),
+            lambda: self._league_fetch(params, headers, extend),
+            lambda data: self._is_final(params, data),
+        )
+        self._track_status(data)
+        return data
+
+    def get(self, params=None, headers=None, extend=""):
+        return self.cache.fetch(
+            self._key("season", params, headers, extend),
+            lambda: self._season_fetch(params, headers, extend),
+            lambda data: not self.season_active,
+        )
+
+
+def init_espn_cache(app):
+    app.extensions["espn_response_cache"] = ESPNResponseCache(
+        app.config["ESPN_CACHE_PATH"], app.config["ESPN_CACHE_LIVE_TTL"]
+    )
+
+
+def get_espn_cache():
+    return current_app.extensions["espn_response_cache"]
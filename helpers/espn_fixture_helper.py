@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fixture_key(path, query, fantasy_filter=None):
+    """
+    Identify an ESPN request independently of the host it was sent to.
+
+    Args:
+        path (str): URL path of the request
+        query (dict): query parameters, values as strings or lists of strings
+        fantasy_filter (str, optional): x-fantasy-filter header
+
+    Returns:
+        str: fixture key
+    """
+    canonical = {
+        name: sorted(str(v) for v in (value if isinstance(value, list) else [value]))
+        for name, value in query.items()
+    }
+    raw = json.dumps(
+        {"path": path, "query": canonical, "filter": fantasy_filter}, sort_keys=True
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def request_key(url, params=None, headers=None):
+    """
+    Fixture key of a request about to be sent with requests.
+    """
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    for name, value in (params or {}).items():
+        query[name] = value
+    return fixture_key(parsed.path, query, (headers or {}).get("x-fantasy-filter"))
+
+
+class FixtureRecorder:
+    """
+    Saves ESPN responses to fixture files that the stand-in server can replay.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def record(self, url, params, headers, status, body):
+        key = request_key(url, params, headers)
+        fixture = {
+            "url": url,
+            "params": params,
+            "filter": (headers or {}).get("x-fantasy-filter"),
+            "status": status,
+            "body": body,
+        }
+        path = os.path.join(self.directory, f"{key}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(fixture, file)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.random.random() < server.error_rate:
+            self._respond(503, {"messages": ["Injected error"]})
+            return
+
+        parsed = urlparse(self.path)
+        key = fixture_key(
+            parsed.path, parse_qs(parsed.query), self.headers.get("x-fantasy-filter")
+        )
+        fixture = server.fixtures.get(key)
+        if fixture is None:
+            self._respond(404, {"messages": [f"No fixture for {self.path}"]})
+            return
+        self._respond(fixture["status"], fixture["body"])
+
+    def _respond(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local HTTP stand-in for the ESPN Fantasy API that replays recorded fixtures,
+    with optional simulated latency and injected 503 errors.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixtures_directory,
+        host="127.0.0.1",
+        port=8001,
+        latency=0,
+        error_rate=0,
+        seed=None,
+        verbose=False,
+    ):
+        super().__init__((host, port), StandInHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.fixtures = {}
+        for name in os.listdir(fixtures_directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(fixtures_directory, name)
+            with open(path, "r", encoding="utf-8") as file:
+                self.fixtures[name[: -len(".json")]] = json.load(file)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serve in a background thread, for use from benchmarks and scripts.
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,109 @@
+import json
+from collections import namedtuple
+
+SlimTeam = namedtuple("SlimTeam", ["team_id", "team_name", "owners"])
+SlimPlayer = namedtuple("SlimPlayer", ["points", "slot_position"])
+SlimBoxScore = namedtuple(
+    "SlimBoxScore",
+    [
+        "home_team",
+        "home_score",
+        "home_lineup",
+        "away_team",
+        "away_score",
+        "away_lineup",
+    ],
+)
+
+# Lineup slot ids used by ESPN for the bench and injured reserve
+BENCH_SLOT_IDS = {20: "BE", 21: "IR"}
+
+
+class SlimLeague:
+    """
+    Lightweight stand-in for espn_api's League for commands that only need teams,
+    owners and scores.
+
+    The league is loaded with the team and settings views only (no rosters, players,
+    pro schedule or draft), and box_scores() requests just the matchup score view for
+    one scoring period. It exposes the attributes of League that ESPNAPIHelper uses.
+    """
+
+    def __init__(self, espn_request, league_id, year):
+        self.espn_request = espn_request
+        self.league_id = league_id
+        self.year = year
+
+        data = self.espn_request.league_get(params={"view": ["mTeam", "mSettings"]})
+        status = data["status"]
+        self.nfl_week = status["latestScoringPeriod"]
+        self.current_week = min(data["scoringPeriodId"], status["finalScoringPeriod"])
+        self.current_matchup_period = status["currentMatchupPeriod"]
+        self.matchup_periods = data["settings"]["scheduleSettings"]["matchupPeriods"]
+
+        members = {member.get("id"): member for member in data.get("members", [])}
+        self.teams = sorted(
+            (self._team(team, members) for team in data["teams"]),
+            key=lambda team: team.team_id,
+        )
+        self._teams_by_id = {team.team_id: team for team in self.teams}
+
+    def _team(self, data, members):
+        team_name = data.get("name")
+        if not team_name:
+            team_name = f"{data.get('location', 'Unknown')} {data.get('nickname', 'Unknown')}"
+        owner_ids = data.get("owners") or [""]
+        owners = [members[owner_ids[0]]] if owner_ids[0] in members else []
+        return SlimTeam(data["id"], team_name, owners)
+
+    def _player(self, entry, week):
+        player = entry["playerPoolEntry"]["player"]
+        points = 0
+        for stat in player.get("stats", []):
+            # statSourceId 0 holds the actual points, 1 the projection
+            if stat.get("scoringPeriodId") == week and stat.get("statSourceId") == 0:
+                points = stat.get("appliedTotal", 0)
+                break
+        return SlimPlayer(points, BENCH_SLOT_IDS.get(entry.get("lineupSlotId")))
+
+    def _side(self, matchup, side, week):
+        if side not in matchup:
+            # Teams on a bye are returned as 0, like espn_api does
+            return 0, 0, []
+        data = matchup[side]
+        score = data.get("totalPointsLive", data.get("totalPoints", 0))
+        entries = data.get("rosterForCurrentScoringPeriod", {}).get("entries", [])
+        return (
+            self._teams_by_id.get(data["teamId"], 0),
+            round(score, 2),
+            [self._player(entry, week) for entry in entries],
+        )
+
+    def box_scores(self, week):
+        """
+        Returns the box scores of a scoring period, mirroring League.box_scores().
+        """
+        matchup_period = self.current_matchup_period
+        scoring_period = self.current_week
+        if week and week <= self.current_week:
+            scoring_period = week
+            for matchup_id, weeks in self.matchup_periods.items():
+                if week in weeks:
+                    matchup_period = matchup_id
+                    break
+
+        filters = {"schedule": {"filterMatchupPeriodIds": {"value": [matchup_period]}}}
+        data = self.espn_request.league_get(
+            params={
+                "view": ["mMatchupScore", "mScoreboard"],
+                "scoringPeriodId": scoring_period,
+            },
+            headers={"x-fantasy-filter": json.dumps(filters)},
+        )
+
+        box_scores = []
+        for matchup in data["schedule"]:
+            home = self._side(matchup, "home", scoring_period)
+            away = self._side(matchup, "away", scoring_period)
+            box_scores.append(SlimBoxScore(*home, *away))
+        return box_scores
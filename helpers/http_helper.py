@@ -0,0 +1,202 @@
+import hashlib
+import random
+import threading
+import time
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+# Statuses worth retrying: ESPN throttling us or having a bad moment
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: allows bursts of `capacity` requests and refills
+    at `rate` requests per second.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token, sleeping until one is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ESPNSession:
+    """
+    Shared keep-alive HTTP session for ESPN requests.
+
+    Requests use fixed connect/read timeouts, are rate limited per league cookie
+    and are retried with jittered exponential backoff on connection errors,
+    timeouts and throttling/5xx responses. No retry waits longer than
+    `max_delay`: a Retry-After beyond it returns the response instead. Latency and
+    retry counts are kept in `stats`.
+    """
+
+    def __init__(
+        self,
+        connect_timeout,
+        read_timeout,
+        rate,
+        burst,
+        max_retries,
+        backoff,
+        max_delay=30,
+        pool_size=10,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+        }
+
+    def _bucket(self, cookies):
+        # One bucket per ESPN_S2/SWID pair, without keeping the secrets as keys
+        key = hashlib.sha256(
+            repr(sorted((cookies or {}).items())).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return self._buckets[key]
+
+    def _record(self, latency=None, retry=False, error=False):
+        with self._lock:
+            if latency is not None:
+                self.stats["requests"] += 1
+                self.stats["total_latency"] += latency
+                self.stats["max_latency"] = max(self.stats["max_latency"], latency)
+            if retry:
+                self.stats["retries"] += 1
+            if error:
+                self.stats["errors"] += 1
+
+    def _delay(self, attempt, response=None):
+        """
+        Seconds to wait before the next attempt, or None if the server asks for
+        longer than max_delay.
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = int(retry_after)
+            return delay if delay <= self.max_delay else None
+        # Full jitter so parallel callers don't retry in lockstep
+        return random.uniform(0, min(self.backoff * 2**attempt, self.max_delay))
+
+    def get(self, url, params=None, headers=None, cookies=None):
+        """
+        GET a URL, retrying transient failures.
+
+        Returns:
+            requests.Response: the last response received
+
+        Raises:
+            requests.RequestException: if every attempt failed without a response
+        """
+        bucket = self._bucket(cookies)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    cookies=cookies,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(time.monotonic() - start, error=True)
+                if attempt == self.max_retries:
+                    raise
+                current_app.logger.warning(f"ESPN request failed ({e}). Retrying...")
+                delay = self._delay(attempt)
+            else:
+                self._record(time.monotonic() - start)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                delay = self._delay(attempt, response)
+                if delay is None:
+                    current_app.logger.warning(
+                        f"ESPN returned HTTP {response.status_code} with Retry-After "
+                        f"{response.headers['Retry-After']}s, over the {self.max_delay}s "
+                        "limit. Giving up."
+                    )
+                    return response
+                current_app.logger.warning(
+                    f"ESPN returned HTTP {response.status_code}. Retrying..."
+                )
+
+            self._record(retry=True)
+            time.sleep(delay)
+
+    def request_count(self):
+        """
+        Number of requests sent to ESPN so far, retries included.
+        """
+        with self._lock:
+            return self.stats["requests"]
+
+    def summary(self):
+        """
+        Human readable summary of the request statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        average = stats["total_latency"] / stats["requests"] if stats["requests"] else 0
+        return (
+            f"{stats['requests']} requests, {stats['retries']} retries, "
+            f"{stats['errors']} errors, avg latency {average:.3f}s, "
+            f"max latency {stats['max_latency']:.3f}s"
+        )
+
+
+def init_espn_session(app):
+    app.extensions["espn_session"] = ESPNSession(
+        connect_timeout=app.config["ESPN_CONNECT_TIMEOUT"],
+        read_timeout=app.config["ESPN_READ_TIMEOUT"],
+        rate=app.config["ESPN_RATE_LIMIT"],
+        burst=app.config["ESPN_RATE_BURST"],
+        max_retries=app.config["ESPN_MAX_RETRIES"],
+        backoff=app.config["ESPN_RETRY_BACKOFF"],
+        max_delay=app.config["ESPN_RETRY_MAX_DELAY"],
+    )
+
+
+def get_espn_session():
+    return current_app.extensions["espn_session"]
@@ -0,0 +1,113 @@
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import case, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+
+def lease_holder_id():
+    """
+    Identify this process among every worker on every host.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire_lease(name, holder, ttl, db, SchedulerLease):
+    """
+    Take or renew a named lease.
+
+    The lease is granted if nobody holds it, if the holder already has it, or if the
+    previous holder let it expire (e.g. the process died), all in one statement so
+    two processes can never both get it. Lease times are in UTC, so the hosts'
+    clocks must be kept in sync.
+
+    Args:
+        name (str): lease name
+        holder (str): id of the process asking, from lease_holder_id
+        ttl (int): seconds the lease lasts unless renewed
+        db (SQLAlchemy): database object
+        SchedulerLease (SchedulerLease): SchedulerLease model
+
+    Returns:
+        bool: whether the holder has the lease
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    try:
+        result = db.session.execute(
+            update(SchedulerLease)
+            .where(
+                SchedulerLease.name == name,
+                or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+            )
+            .values(
+                holder=holder,
+                expires_at=expires_at,
+                acquired_at=case(
+                    (SchedulerLease.holder == holder, SchedulerLease.acquired_at),
+                    else_=now,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # Nobody has taken the lease yet, or somebody else holds it
+            db.session.execute(
+                insert(SchedulerLease).values(
+                    name=name, holder=holder, acquired_at=now, expires_at=expires_at
+                )
+            )
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def release_lease(name, holder, db, SchedulerLease):
+    """
+    Give up a lease so another process can take it without waiting for it to expire.
+    """
+    db.session.execute(
+        update(SchedulerLease)
+        .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+        .values(expires_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+@contextmanager
+def record_job_run(job, holder, db, JobRun):
+    """
+    Record the start, duration and outcome of a scheduler job run.
+
+    The body may set run["message"] to a summary to store with the run. Exceptions
+    are recorded as an "error" outcome and raised again.
+    """
+    run = {"message": None}
+    started_at = datetime.utcnow()
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield run
+    except Exception as e:
+        outcome = "error"
+        run["message"] = str(e)
+        db.session.rollback()
+        raise
+    finally:
+        db.session.add(
+            JobRun(
+                job=job,
+                holder=holder,
+                started_at=started_at,
+                duration=time.perf_counter() - start,
+                outcome=outcome,
+                message=run["message"],
+            )
+        )
+        db.session.commit()
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from sqlalchemy import case, func
+
+
+def load_poll_weeks(year, db, Game, Schedule):
+    """
+    Load the scheduled weeks of a year with the state of their games.
+
+    Args:
+        year (int): year to poll
+        db (SQLAlchemy): database object
+        Game (Game): Game model
+        Schedule (Schedule): Schedule model
+
+    Returns:
+        list: one dict per scheduled week with its week number, first and last
+        kickoff, number of games and whether all of them are Completed
+    """
+    games = {
+        week: (count, pending)
+        for week, count, pending in db.session.query(
+            Game.week,
+            func.count(Game.id),
+            func.count(case((Game.status == "Completed", None), else_=1)),
+        )
+        .filter(Game.year == year)
+        .group_by(Game.week)
+        .all()
+    }
+
+    weeks = []
+    for schedule_week in (
+        Schedule.query.filter_by(year=year).order_by(Schedule.week).all()
+    ):
+        count, pending = games.get(schedule_week.week, (0, 0))
+        weeks.append(
+            {
+                "week": schedule_week.week,
+                "early": schedule_week.early_game_date_time,
+                "late": schedule_week.late_game_date_time,
+                "games": count,
+                "completed": count > 0 and pending == 0,
+            }
+        )
+    return weeks
+
+
+def due_weeks(now, weeks):
+    """
+    Weeks whose games have kicked off and are not all Completed yet.
+    """
+    return [
+        week["week"]
+        for week in weeks
+        if week["games"] and not week["completed"] and week["early"] <= now
+    ]
+
+
+def next_poll_interval(now, weeks, changed, previous, config):
+    """
+    Decide how long to wait before polling the scores again.
+
+    While a week's games are on, scores are polled every live interval as long as
+    they keep moving, and the interval doubles (up to the max interval) while they
+    don't, so the gaps between game slates are polled less and less. Weeks that have
+    played out but are not final on ESPN yet are checked every final interval, and
+    the next kickoff is always waited for exactly.
+
+    Args:
+        now (datetime): time of the poll
+        weeks (list): weeks returned by load_poll_weeks
+        changed (bool): whether the poll changed any game
+        previous (timedelta): previous interval if games were on then too, or None
+        config (dict): app config with the SCHEDULER_* intervals
+
+    Returns:
+        tuple: time until the next poll (timedelta) and whether games are on (bool)
+    """
+    live = timedelta(seconds=config["SCHEDULER_LIVE_INTERVAL"])
+    game_length = timedelta(seconds=config["SCHEDULER_GAME_LENGTH"])
+
+    pending = [week for week in weeks if not week["completed"]]
+    if not pending:
+        return timedelta(seconds=config["SCHEDULER_IDLE_INTERVAL"]), False
+
+    live_now = any(
+        week["early"] <= now <= week["late"] + game_length for week in pending
+    )
+    if live_now:
+        if changed or previous is None:
+            interval = live
+        else:
+            interval = min(
+                max(previous * 2, live),
+                timedelta(seconds=config["SCHEDULER_MAX_INTERVAL"]),
+            )
+    elif any(now > week["late"] + game_length for week in pending):
+        interval = timedelta(seconds=config["SCHEDULER_FINAL_INTERVAL"])
+    else:
+        interval = timedelta(seconds=config["SCHEDULER_IDLE_INTERVAL"])
+
+    kickoffs = [week["early"] for week in pending if week["early"] > now]
+    if kickoffs:
+        interval = min(interval, min(kickoffs) - now)
+    return interval, live_now
@@ -0,0 +1,163 @@
+import os
+import threading
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+import requests
+from lxml import etree
+
+SCHEDULE_URL = "https://www.pro-football-reference.com/years/{year}/games.htm"
+
+# Columns of the pro-football-reference games table that are read
+SCHEDULE_STATS = ("week_num", "game_date", "gametime")
+
+# Round timelines by year, as (season version, timeline)
+_timelines = {}
+_timelines_lock = threading.Lock()
+
+
+def schedule_page_path(year, directory):
+    return os.path.join(directory, f"games-{year}.htm")
+
+
+def fetch_schedule_page(year, directory, refresh=False, timeout=30):
+    """
+    Path of the pro-football-reference schedule page of a year, downloading it
+    only if it isn't cached on disk yet (or refresh is asked for). Once cached,
+    imports of that year run offline.
+
+    Args:
+        year (int): NFL season
+        directory (str): schedule cache directory
+        refresh (bool, optional): download the page again. Defaults to False.
+        timeout (int, optional): request timeout in seconds. Defaults to 30.
+
+    Returns:
+        str: path of the cached page
+    """
+    path = schedule_page_path(year, directory)
+    if os.path.isfile(path) and not refresh:
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    r = requests.get(SCHEDULE_URL.format(year=year), timeout=timeout)
+    r.raise_for_status()
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(r.content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def parse_schedule_page(path):
+    """
+    Stream the games of a schedule page, keeping only their week, date and time.
+    Header rows repeated through the table and playoff rounds have no week
+    number and are skipped.
+
+    Args:
+        path (str): cached schedule page
+
+    Returns:
+        dict: "week", "date" and "time" lists, one entry per game
+    """
+    columns = {"week": [], "date": [], "time": []}
+    for _, row in etree.iterparse(
+        path, events=("end",), tag="tr", html=True, no_network=True
+    ):
+        # Week and date are usually links, so read the text of the whole cell
+        cells = {
+            cell.get("data-stat"): "".join(cell.itertext()).strip()
+            for cell in row
+            if cell.get("data-stat") in SCHEDULE_STATS
+        }
+        if cells.get("week_num", "").isdigit() and cells.get("game_date"):
+            columns["week"].append(int(cells["week_num"]))
+            columns["date"].append(cells["game_date"])
+            columns["time"].append(cells.get("gametime", ""))
+        # Free the rows already read
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+    return columns
+
+
+def schedule_weeks(columns, weeks):
+    """
+    First and last kickoff of each week and the Tuesday 00:01 the week starts on
+    (the Tuesday before, for a week opening on a Tuesday), for all games at once.
+
+    Args:
+        columns (dict): games from parse_schedule_page
+        weeks (iterable): weeks to keep
+
+    Returns:
+        DataFrame: week, early, late and week_start, one row per week
+    """
+    games = pd.DataFrame(columns).astype({"week": int, "date": str, "time": str})
+    games = games[games["week"].isin(list(weeks))]
+    kickoffs = pd.to_datetime(
+        games["date"] + " " + games["time"], format="%Y-%m-%d %I:%M%p"
+    )
+    bounds = kickoffs.groupby(games["week"]).agg(["min", "max"])
+
+    early = bounds["min"]
+    days_back = (early.dt.weekday - 1) % 7
+    days_back = np.where(days_back == 0, 7, days_back)
+    week_start = (
+        early.dt.normalize()
+        - pd.to_timedelta(days_back, unit="D")
+        + pd.Timedelta(minutes=1)
+    )
+    return pd.DataFrame(
+        {
+            "week": bounds.index.astype(int),
+            "early": early.values,
+            "late": bounds["max"].values,
+            "week_start": week_start.values,
+        }
+    )
+
+
+def season_timeline(year, version, Schedule):
+    """
+    Start of each round of a season, one per scheduled week in week order.
+
+    Timelines are kept in memory per season and rebuilt only when the season
+    version changes, which importing its schedule does.
+
+    Args:
+        year (int): NFL season
+        version (int): current season version
+        Schedule (Schedule): Schedule model
+
+    Returns:
+        list: week_start datetimes, sorted, round 1 first
+    """
+    with _timelines_lock:
+        cached = _timelines.get(year)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    timeline = [
+        week_start
+        for (week_start,) in Schedule.query.with_entities(Schedule.week_start)
+        .filter_by(year=year)
+        .order_by(Schedule.week)
+    ]
+    with _timelines_lock:
+        _timelines[year] = (version, timeline)
+    return timeline
+
+
+def round_at(timeline, now):
+    """
+    Round being played at a time: the last round that has started, round 1
+    before the first one does.
+
+    Returns:
+        int: round, or None for an empty timeline
+    """
+    if not timeline:
+        return None
+    return max(1, bisect_right(timeline, now))
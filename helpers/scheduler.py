@@ -1,10 +1,21 @@
-from datetime import datetime, time
+from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.combining import OrTrigger
-import subprocess
+from apscheduler.triggers.interval import IntervalTrigger
+from app import app
+from helpers.espn_api_helper import ESPNAPIHelper
+from helpers.http_helper import get_espn_session
+from helpers.lease_helper import (
+    acquire_lease,
+    lease_holder_id,
+    record_job_run,
+    release_lease,
+)
+from helpers.poll_helper import due_weeks, load_poll_weeks, next_poll_interval
+from models import db, Game, JobRun, Schedule, SchedulerLease
+import atexit
 import logging
 import os
+import time as timer
 
 scheduler = BackgroundScheduler(daemon=True)
 
@@ -19,80 +30,164 @@ if not os.path.isfile(LOG_FILENAME):
 
 logging.basicConfig(level=LOG_LEVEL, filename=LOG_FILENAME, filemode='a', format=LOG_FORMAT, datefmt=DATE_FORMAT)
 
+# Every gunicorn worker on every host starts a scheduler, but only the holder of
+# this database lease runs the jobs. The others keep trying to take it over, so a
+# new process takes over within SCHEDULER_LEASE_TTL seconds if the holder dies.
+LEASE_NAME = "scheduler"
+LEASE_HOLDER = lease_holder_id()
+lease_state = {"leader": False}
+
+
+def format_timings(timings):
+    return ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in timings.items())
+
+
+def scheduler_lease_job():
+    """
+    Take or renew the scheduler lease.
+    """
+    try:
+        with app.app_context():
+            leader = acquire_lease(
+                LEASE_NAME,
+                LEASE_HOLDER,
+                app.config["SCHEDULER_LEASE_TTL"],
+                db,
+                SchedulerLease,
+            )
+    except Exception as e:
+        logging.error(f"Error renewing the scheduler lease: {e}")
+        leader = False
+
+    if leader != lease_state["leader"]:
+        logging.info(
+            f"{LEASE_HOLDER} {'is now' if leader else 'is no longer'} the active scheduler."
+        )
+    lease_state["leader"] = leader
+
+
+def run_leader_job(job, body):
+    """
+    Run a job in the app if this process holds the scheduler lease, recording the
+    run in the JobRun table.
+
+    Args:
+        job (str): job name
+        body (callable): does the work and returns a summary of the run
+
+    Returns:
+        bool: whether the job ran
+    """
+    if not lease_state["leader"]:
+        return False
+
+    # Run in the long-lived app so the DB pool, ESPN session and caches
+    # are reused from one tick to the next
+    with app.app_context():
+        # Confirm the lease is still ours before doing any work
+        if not acquire_lease(
+            LEASE_NAME, LEASE_HOLDER, app.config["SCHEDULER_LEASE_TTL"], db, SchedulerLease
+        ):
+            lease_state["leader"] = False
+            return False
+
+        with record_job_run(job, LEASE_HOLDER, db, JobRun) as run:
+            run["message"] = body()
+    return True
+
+
+# When the scores are polled next, the last interval while games were on and the
+# fingerprints of the weeks' box scores at the last poll
+poll_state = {"next_poll": None, "live_interval": None, "fingerprints": {}}
+
+
+def poll_game_results(now):
+    current_year = now.year
+    timings = {}
+
+    weeks = load_poll_weeks(current_year, db, Game, Schedule)
+    due = due_weeks(now, weeks)
+    changed = False
+    requests = 0
+    if due:
+        requests_before = get_espn_session().request_count()
+        start = timer.perf_counter()
+        api_helper = ESPNAPIHelper(current_year)
+        league = api_helper.espn_api_call(slim=True)
+        timings["league"] = timer.perf_counter() - start
+
+        if league is not None:
+            changed = api_helper.update_results(
+                league, due, timings, poll_state["fingerprints"]
+            )
+            # Weeks may have just become Completed
+            weeks = load_poll_weeks(current_year, db, Game, Schedule)
+        requests = get_espn_session().request_count() - requests_before
+
+    interval, live = next_poll_interval(
+        now, weeks, changed, poll_state["live_interval"], app.config
+    )
+    poll_state["next_poll"] = now + interval
+    poll_state["live_interval"] = interval if live else None
+
+    return (
+        f"weeks polled {due} ({format_timings(timings)}), "
+        f"ESPN requests {requests}, "
+        f"next poll at {poll_state['next_poll']:%Y-%m-%d %H:%M:%S}"
+    )
+
 
 def update_game_results_job():
+    """
+    Poll the scores of the weeks whose games are on, then plan the next poll from
+    the schedule. The job ticks every SCHEDULER_LIVE_INTERVAL but returns straight
+    away until the planned time.
+    """
     now = datetime.now()
-    current_time = now.time()
-    current_day = now.weekday()  # Monday is 0, Sunday is 6
-
-    # Define the time bounds
-    start_time = time(19, 0)  # 7 PM
-    end_time = time(23, 0)  # 11 PM
-    
-    days_to_run = [0, 3, 4, 5, 6]  # List of days to run your code
-
-    # Check if current time is within the desired timeframe
-    if (
-        (current_day == 3 and current_time >= start_time)
-        or (current_day == 0 and current_time <= end_time)
-        or (current_day in days_to_run)
-    ):
-        try:
-            # Get the current year
-            current_year = datetime.now().year
-
-            # Define the command to run, using the current year
-            command = [
-                "flask",
-                "update_game_results",
-                "--start-week",
-                "15",
-                "--end-week",
-                "17",
-                f"--year={current_year}",  # Use the current year in the command
-            ]
-
-            # Run the Flask command as a subprocess
-            subprocess.run(command, check=True)
-            logging.info(f"Update game results command ran successfully.")
-
-        except Exception as e:
-            # Handle any exceptions that may occur during the command execution
-            logging.error(f"Error running Flask command: {e}")
-    else:
+    if poll_state["next_poll"] is not None and now < poll_state["next_poll"]:
         return
 
-
-def update_tournament_command_job():
     try:
-        current_year = datetime.now().year
-        command = [
-            "flask",
-            "update_tournament",
-            "--start-week",
-            "15",
-            "--end-week",
-            "17",
-            f"--year={current_year}",
-        ]
-        subprocess.run(command, check=True)
-        logging.info(f"Update tournament command ran successfully.")
+        if run_leader_job("update_game_results", lambda: poll_game_results(now)):
+            logging.info(f"Update game results job ran successfully.")
+        else:
+            # Let whoever becomes the leader poll straight away
+            poll_state["next_poll"] = None
     except Exception as e:
-        logging.error(f"Error running Flask command: {e}")
+        # Handle any exceptions that may occur during the job, trying again next tick
+        poll_state["next_poll"] = None
+        logging.error(f"Error running update game results job: {e}")
+
+
+def shutdown_scheduler():
+    """
+    Stop the scheduler and hand the lease over straight away.
+    """
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    if lease_state["leader"]:
+        with app.app_context():
+            release_lease(LEASE_NAME, LEASE_HOLDER, db, SchedulerLease)
 
 
-# Schedule for update_game_results_job
+# Runs of a job never overlap, and missed runs are collapsed into one
+job_defaults = {"coalesce": True, "max_instances": 1}
+
 scheduler.add_job(
-    update_game_results_job,
-    trigger=OrTrigger([
-        CronTrigger(hour="19-23", minute="*/5", day_of_week="thu, mon"),
-        CronTrigger(hour="11-23", minute="*/5", day_of_week="fri, sat, sun"),
-    ])
+    scheduler_lease_job,
+    id="scheduler_lease",
+    trigger=IntervalTrigger(seconds=max(app.config["SCHEDULER_LEASE_TTL"] // 3, 1)),
+    next_run_time=datetime.now(),
+    **job_defaults,
 )
 
+# update_game_results_job plans its own polls from the schedule; this is only its tick
 scheduler.add_job(
-    update_tournament_command_job,
-    trigger=CronTrigger(day_of_week="tue", hour=3, minute=0),
+    update_game_results_job,
+    id="update_game_results",
+    trigger=IntervalTrigger(seconds=app.config["SCHEDULER_LIVE_INTERVAL"]),
+    **job_defaults,
 )
 
 scheduler.start()
+atexit.register(shutdown_scheduler)
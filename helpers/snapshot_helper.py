@@ -0,0 +1,121 @@
+import orjson
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, event, select
+from helpers.db_helper import bracket_snapshot, load_bracket
+from helpers.engine_helper import RoutingSession
+from models import db, BracketSnapshot, Game, Schedule, SeasonVersion, Tournament
+
+
+def publish_snapshot(session, year):
+    """
+    Build the bracket snapshot of a season at its current version and add it to
+    the session's transaction, dropping the versions older than the retention
+    period. The latest version is always kept.
+
+    Args:
+        session (Session): session of the transaction that changed the season
+        year (int): season to publish
+
+    Returns:
+        BracketSnapshot: the published snapshot
+    """
+    # The version was bumped by a Core statement, so reload it over any copy the
+    # session already holds
+    season = session.execute(
+        select(SeasonVersion)
+        .where(SeasonVersion.year == year)
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+    bracket = load_bracket(year, db, Game, Schedule, Tournament)
+    snapshot = session.merge(
+        BracketSnapshot(
+            year=year,
+            version=season.version,
+            payload=orjson.dumps(bracket_snapshot(bracket, season.version)).decode(
+                "utf-8"
+            ),
+            finished=season.finished,
+            updated_at=season.updated_at,
+        )
+    )
+
+    cutoff = datetime.utcnow() - timedelta(
+        seconds=current_app.config["BRACKET_SNAPSHOT_RETENTION"]
+    )
+    session.execute(
+        delete(BracketSnapshot).where(
+            BracketSnapshot.year == year,
+            BracketSnapshot.version < season.version,
+            BracketSnapshot.updated_at < cutoff,
+        )
+    )
+    return snapshot
+
+
+def publish_bumped_snapshots(session):
+    """
+    Publish a snapshot of every season whose version moved in the transaction
+    about to commit, so the snapshot and the games it shows are committed
+    together and readers never see a half-updated bracket.
+    """
+    if session.info.get("read_only"):
+        return
+    session.flush()
+    for year in sorted(session.info.pop("bumped_seasons", set())):
+        publish_snapshot(session, year)
+
+
+def discard_bumped_seasons(session, previous_transaction):
+    session.info.pop("bumped_seasons", None)
+
+
+def init_bracket_snapshots(app):
+    event.listen(RoutingSession, "before_commit", publish_bumped_snapshots)
+    event.listen(RoutingSession, "after_soft_rollback", discard_bumped_seasons)
+
+
+def get_latest_snapshot(year):
+    """
+    Latest published bracket snapshot of a season, in one primary key lookup.
+
+    Returns:
+        BracketSnapshot: snapshot, or None if none has been published
+    """
+    return (
+        BracketSnapshot.query.filter_by(year=year)
+        .order_by(BracketSnapshot.version.desc())
+        .first()
+    )
+
+
+def get_latest_season(year):
+    """
+    Latest published bracket snapshot of a season, or its SeasonVersion if the
+    season was last updated before snapshots were published. Both carry the
+    version, finished and updated_at of the season.
+
+    Returns:
+        BracketSnapshot | SeasonVersion: season state, or None for a season
+        without games
+    """
+    return get_latest_snapshot(year) or db.session.get(SeasonVersion, year)
+
+
+def snapshot_payload(year, season):
+    """
+    Encoded JSON bracket of a season: the payload of its latest snapshot, or built
+    from its games for a season that has none published yet.
+
+    Args:
+        year (int): season
+        season (BracketSnapshot | SeasonVersion): from get_latest_season, or None
+
+    Returns:
+        str: encoded bracket snapshot
+    """
+    if isinstance(season, BracketSnapshot):
+        return season.payload
+    bracket = load_bracket(year, db, Game, Schedule, Tournament)
+    version = season.version if season else 0
+    return orjson.dumps(bracket_snapshot(bracket, version)).decode("utf-8")
@@ -0,0 +1,141 @@
+import orjson
+import queue
+import threading
+from flask import current_app
+from helpers.snapshot_helper import get_latest_season, snapshot_payload
+from models import db, SeasonVersion
+
+
+class BracketBroadcaster:
+    """
+    Pushes changed bracket games to every Server-Sent Events subscriber of a year.
+
+    A single background thread per process watches the season versions of the
+    years that have subscribers (one query per interval, however many viewers
+    are connected) and fans the changed games out to the subscriber queues.
+    Commits made in this process wake the thread immediately.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config["BRACKET_STREAM_POLL_INTERVAL"]
+        self._subscribers = {}
+        self._versions = {}
+        self._games = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self, year, version=None):
+        """
+        Register a subscriber for a year.
+
+        Args:
+            year (int): year of the bracket
+            version (int, optional): season version the viewer's page was rendered at.
+                If the bracket has changed since, all games are sent straight away.
+
+        Returns:
+            queue.Queue: queue receiving the encoded lists of changed games
+        """
+        subscription = queue.Queue()
+        # Held while loading and sending the first games, so the poll thread
+        # and other viewers cannot swap the year's state out from under it
+        with self._lock:
+            self._subscribers.setdefault(year, set()).add(subscription)
+            if year not in self._versions:
+                self.refresh(year)
+            if version is not None and version != self._versions[year]:
+                subscription.put(orjson.dumps(list(self._games[year].values())))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, year, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(year, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(year, None)
+                self._versions.pop(year, None)
+                self._games.pop(year, None)
+
+    def notify(self):
+        """
+        Wake the broadcaster to check for changes without waiting for the next poll.
+        """
+        self._wake.set()
+
+    def refresh(self, year, version=None):
+        """
+        Load the bracket snapshot of a year and return the games that changed
+        since it was last loaded. Must be called with the lock held.
+        """
+        season = get_latest_season(year)
+        if version is None:
+            version = season.version if season else 0
+
+        payload = snapshot_payload(year, season)
+        games = {
+            game["id"]: game
+            for round_data in orjson.loads(payload)["rounds"]
+            for game in round_data["games"]
+        }
+
+        previous = self._games.get(year, {})
+        self._games[year] = games
+        self._versions[year] = version
+        return [game for game_id, game in games.items() if previous.get(game_id) != game]
+
+    def poll(self):
+        """
+        Publish the changed games of every subscribed year whose version has moved.
+        """
+        with self._lock:
+            years = list(self._subscribers)
+        if not years:
+            return
+
+        seasons = SeasonVersion.query.filter(SeasonVersion.year.in_(years)).all()
+        for season in seasons:
+            with self._lock:
+                # Skip years whose last viewer left since the subscribers were read
+                subscribers = list(self._subscribers.get(season.year, ()))
+                if not subscribers or season.version == self._versions.get(season.year):
+                    continue
+                changed = self.refresh(season.year, season.version)
+                if not changed:
+                    continue
+                payload = orjson.dumps(changed)
+                for subscription in subscribers:
+                    subscription.put(payload)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    self.poll()
+                except Exception as e:
+                    current_app.logger.error(f"Unable to broadcast bracket changes: {e}")
+                finally:
+                    db.session.remove()
+
+
+def init_bracket_broadcaster(app):
+    app.extensions["bracket_broadcaster"] = BracketBroadcaster(app)
+
+
+def get_bracket_broadcaster():
+    return current_app.extensions["bracket_broadcaster"]
+
+
+def notify_bracket_change():
+    """
+    Let subscribers in this process know the bracket data may have changed.
+    """
+    broadcaster = current_app.extensions.get("bracket_broadcaster")
+    if broadcaster is not None:
+        broadcaster.notify()
@@ -0,0 +1,124 @@
+"""Schedule datetime columns
+
+Revision ID: 7c4e1b9a3f62
+Revises: 5e8a2c7d4b19
+Create Date: 2026-10-18 14:02:51.730114
+
+"""
+from datetime import datetime, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e1b9a3f62'
+down_revision = '5e8a2c7d4b19'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('week_start', 'early_game_date_time', 'late_game_date_time')
+
+
+def schedule_table(type_):
+    return sa.table(
+        'schedule',
+        sa.column('id', sa.Integer),
+        *(sa.column(name, type_) for name in COLUMNS)
+    )
+
+
+def parse(value):
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def previous_tuesday(date):
+    days_back = (date.weekday() - 1) % 7 or 7
+    return (date - timedelta(days=days_back)).replace(
+        hour=0, minute=1, second=0, microsecond=0
+    )
+
+
+def replace_columns(old_type, new_type, convert):
+    """
+    Recreate the schedule date columns with a new type, carrying every row over
+    through convert(row) -> dict of new values.
+    """
+    bind = op.get_bind()
+    old = schedule_table(old_type)
+    rows = bind.execute(
+        sa.select(old.c.id, *(sa.cast(old.c[name], sa.String) for name in COLUMNS))
+    ).all()
+
+    # Convert every row before the columns are dropped, so bad data stops the
+    # migration with the table untouched
+    values = {}
+    invalid = []
+    for row in rows:
+        try:
+            values[row[0]] = convert(row[1:])
+        except ValueError as e:
+            invalid.append(f"id {row[0]}: {e}")
+    if invalid:
+        raise ValueError(
+            "Fix or delete these schedule rows before upgrading: " + "; ".join(invalid)
+        )
+
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        for name in COLUMNS:
+            batch_op.drop_column(name)
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        for name in COLUMNS:
+            batch_op.add_column(sa.Column(name, new_type, nullable=True))
+
+    new = schedule_table(new_type)
+    for id_, row_values in values.items():
+        bind.execute(sa.update(new).where(new.c.id == id_).values(**row_values))
+
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        for name in COLUMNS:
+            batch_op.alter_column(name, existing_type=new_type, nullable=False)
+
+
+def to_datetimes(row):
+    week_start, early, late = (parse(value) for value in row)
+    if early is None or late is None:
+        raise ValueError(f"unreadable game dates {row[1]!r}, {row[2]!r}")
+    # week_start was declared Integer; rebuild it from the first kickoff if it
+    # didn't hold a date
+    return {
+        'week_start': week_start or previous_tuesday(early),
+        'early_game_date_time': early,
+        'late_game_date_time': late,
+    }
+
+
+def to_strings(row):
+    values = [parse(value) for value in row]
+    if None in values:
+        raise ValueError(f"unreadable dates {row!r}")
+    return dict(zip(COLUMNS, (value.isoformat() for value in values)))
+
+
+def upgrade():
+    replace_columns(sa.String(50), sa.DateTime(), to_datetimes)
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.create_index('ix_schedule_year_week', ['year', 'week'], unique=False)
+
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('schedule', schema=None) as batch_op:
+        batch_op.drop_index('ix_schedule_year_week')
+
+    # ### end Alembic commands ###
+
+    # week_start goes back to a string too: the ISO dates it held never fit the
+    # Integer it was declared as
+    replace_columns(sa.DateTime(), sa.String(50), to_strings)
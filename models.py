@@ -1,6 +1,11 @@
+import math
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import case, distinct, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from helpers.engine_helper import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class Owner(db.Model):
@@ -10,6 +15,8 @@ class Owner(db.Model):
     email = db.Column(db.String(100), nullable=True)
     phone = db.Column(db.String(12), nullable=True)
 
+    __table_args__ = (db.UniqueConstraint("espn_id", name="uq_owner_espn_id"),)
+
 
 class Team(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -18,6 +25,11 @@ class Team(db.Model):
     year = db.Column(db.Integer)
     name = db.Column(db.String(200))
 
+    __table_args__ = (
+        db.UniqueConstraint("owner_id", "year", name="uq_team_owner_id_year"),
+        db.Index("ix_team_year_name", "year", "name"),
+    )
+
 
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -39,11 +51,117 @@ class Game(db.Model):
     winner_team_id = db.Column(db.Integer, db.ForeignKey("team.id"), nullable=True)
     loser_team_id = db.Column(db.Integer, db.ForeignKey("team.id"), nullable=True)
 
+    __table_args__ = (
+        # A team plays once a week. Also serves every lookup of a season's games.
+        db.UniqueConstraint("year", "week", "team1_id", name="uq_game_year_week_team1_id"),
+        db.Index("ix_game_year_week_status", "year", "week", "status"),
+        db.Index("ix_game_year_week_team1_seed", "year", "week", "team1_seed"),
+    )
+
 
 class Schedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     year = db.Column(db.Integer, nullable=False)
     week = db.Column(db.Integer, nullable=False)
-    week_start = db.Column(db.Integer, nullable=False)
-    early_game_date_time = db.Column(db.String(50), nullable=False)
-    late_game_date_time = db.Column(db.String(50), nullable=False)
+    week_start = db.Column(db.DateTime, nullable=False)
+    early_game_date_time = db.Column(db.DateTime, nullable=False)
+    late_game_date_time = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("year", "week", name="uq_schedule_year_week"),
+    )
+
+
+class Tournament(db.Model):
+    """
+    Shape of a season's bracket, stored when its tournament is populated.
+    """
+
+    year = db.Column(db.Integer, primary_key=True)
+    league_size = db.Column(db.Integer, nullable=False)
+    bracket_size = db.Column(db.Integer, nullable=False)
+    final_week = db.Column(db.Integer, nullable=False)
+
+
+class SeasonVersion(db.Model):
+    year = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    finished = db.Column(db.Boolean, nullable=False, default=False)
+
+
+class BracketSnapshot(db.Model):
+    year = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    finished = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+
+class SchedulerLease(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(200), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class JobRun(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(50), nullable=False)
+    holder = db.Column(db.String(200), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    duration = db.Column(db.Float, nullable=False)
+    outcome = db.Column(db.String(20), nullable=False)
+    message = db.Column(db.Text, nullable=True)
+
+
+@event.listens_for(Session, "before_flush")
+def collect_changed_seasons(session, flush_context, instances):
+    """
+    Remember the years of Game, Team and Schedule rows about to be written so
+    their season version can be bumped once the flush has run.
+    """
+    changed = session.info.setdefault("changed_seasons", set())
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, (Game, Team, Schedule)) and obj.year is not None:
+            changed.add(obj.year)
+    for obj in session.dirty:
+        if isinstance(obj, (Game, Team, Schedule)) and session.is_modified(obj):
+            changed.add(obj.year)
+
+
+@event.listens_for(Session, "after_flush")
+def bump_season_versions(session, flush_context):
+    """
+    Increment the version of every season changed by the flush, in the same
+    transaction, and record whether every round of its bracket is now Completed.
+    """
+    changed = session.info.pop("changed_seasons", set())
+    # Seasons to publish a bracket snapshot of before the transaction commits
+    session.info.setdefault("bumped_seasons", set()).update(changed)
+    connection = session.connection()
+    for year in sorted(changed):
+        rounds, pending = connection.execute(
+            select(
+                func.count(distinct(Game.round)),
+                func.count(case((Game.status == "Completed", None), else_=1)),
+            ).where(Game.year == year)
+        ).one()
+        # Seasons populated before their shape was stored have three rounds
+        bracket_size = connection.execute(
+            select(Tournament.bracket_size).where(Tournament.year == year)
+        ).scalar()
+        final_round = math.ceil(math.log2(bracket_size)) if bracket_size else 3
+        values = {
+            "updated_at": datetime.utcnow(),
+            "finished": rounds >= final_round and pending == 0,
+        }
+        result = connection.execute(
+            update(SeasonVersion)
+            .where(SeasonVersion.year == year)
+            .values(version=SeasonVersion.version + 1, **values)
+        )
+        if result.rowcount == 0:
+            connection.execute(
+                insert(SeasonVersion).values(year=year, version=1, **values)
+            )
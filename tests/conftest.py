@@ -0,0 +1,45 @@
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from helpers.cache_helper import init_bracket_cache
+from models import db
+
+
+@pytest.fixture
+def app():
+    """
+    Bare app on an in-memory SQLite database with every table created.
+    """
+    app = Flask(__name__)
+    app.config.from_object("config.config.Config")
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_BINDS"] = {}
+    app.config["ESPN_LEAGUE_ID"] = "1"
+    app.config["BRACKET_CACHE_BACKEND"] = "memory"
+    db.init_app(app)
+    init_bracket_cache(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Count the statements run on the database inside a with block.
+    """
+
+    class QueryCounter:
+        def __enter__(self):
+            self.count = 0
+            event.listen(db.engine, "before_cursor_execute", self._count)
+            return self
+
+        def _count(self, *args, **kwargs):
+            self.count += 1
+
+        def __exit__(self, *exc_info):
+            event.remove(db.engine, "before_cursor_execute", self._count)
+
+    return QueryCounter
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+import pytest
+from helpers.bracket_helper import (
+    bracket_games,
+    bracket_seeds,
+    build_bracket,
+    check_bracket,
+    evaluate_bracket,
+)
+
+
+def stored_games(bracket, year=2023):
+    """
+    Games of a bracket as they are stored once the tournament is populated, with
+    team ids equal to their seeds.
+    """
+    seed_teams = {seed: seed for seed in bracket_seeds(bracket)}
+    return [
+        SimpleNamespace(
+            id=game_id,
+            team1_score=None,
+            team2_score=None,
+            winner_team_id=None,
+            loser_team_id=None,
+            **row,
+        )
+        for game_id, (_, row) in enumerate(bracket_games(bracket, year, seed_teams), 1)
+    ]
+
+
+def play(games, round_number, scores):
+    """
+    Complete the games of a round with the given (team1, team2) scores, in order.
+    """
+    round_games = [game for game in games if game.round == round_number]
+    for game, (team1_score, team2_score) in zip(round_games, scores):
+        game.team1_score, game.team2_score = team1_score, team2_score
+        game.status = "Completed"
+
+
+def apply(changes):
+    for game, values in changes:
+        for column, value in values.items():
+            setattr(game, column, value)
+
+
+def test_build_bracket_is_the_original_bracket_for_12_teams():
+    bracket = build_bracket(12)
+
+    assert bracket["start_week"] == 15 and bracket["final_week"] == 17
+    assert [(slot["team1"], slot["team2"]) for slot in bracket["slots"]] == [
+        (("seed", 7), ("seed", 10)),
+        (("seed", 8), ("seed", 9)),
+        (("seed", 11), ("loser", "r1g1")),
+        (("seed", 12), ("loser", "r1g2")),
+        (("loser", "r2g1"), ("loser", "r2g2")),
+    ]
+
+
+def test_losers_move_on_to_the_next_round():
+    bracket = build_bracket(12)
+    games = stored_games(bracket)
+    play(games, 1, [(100, 90), (80, 95)])
+
+    apply(evaluate_bracket(bracket, games))
+
+    round1 = [game for game in games if game.round == 1]
+    round2 = [game for game in games if game.round == 2]
+    assert [(game.winner_team_id, game.loser_team_id) for game in round1] == [(7, 10), (9, 8)]
+    assert [(game.team1_id, game.team2_id) for game in round2] == [(11, 10), (12, 8)]
+    assert [(game.team2_seed, game.status) for game in round2] == [
+        (10, "Scheduled"),
+        (8, "Scheduled"),
+    ]
+
+
+def test_ties_go_to_team1():
+    bracket = build_bracket(12)
+    games = stored_games(bracket)
+    play(games, 1, [(100, 100), (90, 90)])
+
+    apply(evaluate_bracket(bracket, games))
+
+    round2 = [game for game in games if game.round == 2]
+    assert [game.team2_id for game in round2] == [10, 9]
+
+
+def test_score_correction_reassigns_later_rounds():
+    bracket = build_bracket(12)
+    games = stored_games(bracket)
+    play(games, 1, [(100, 90), (100, 90)])
+    apply(evaluate_bracket(bracket, games))
+    play(games, 2, [(100, 90), (100, 90)])
+    apply(evaluate_bracket(bracket, games))
+    assert evaluate_bracket(bracket, games) == []
+
+    # 7 actually lost round 1
+    games[0].team1_score = 80
+    apply(evaluate_bracket(bracket, games))
+
+    round2, final = games[2], games[4]
+    assert (games[0].winner_team_id, games[0].loser_team_id) == (10, 7)
+    assert (round2.team2_id, round2.winner_team_id, round2.loser_team_id) == (7, 11, 7)
+    assert final.team1_id == 7
+    assert evaluate_bracket(bracket, games) == []
+
+
+def test_check_bracket_rejects_games_of_another_bracket():
+    games = stored_games(build_bracket(12))
+
+    check_bracket(build_bracket(12), games)
+    with pytest.raises(ValueError):
+        check_bracket(build_bracket(11), games)
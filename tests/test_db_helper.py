@@ -0,0 +1,156 @@
+from datetime import datetime
+from helpers.db_helper import bulk_upsert, load_bracket
+from models import db, Owner, Team, Game, Schedule, Tournament
+
+
+def seed_bracket(year, games):
+    """
+    Add a season with the given number of games, two teams each, and its schedule.
+    """
+    owners = [Owner(espn_id=f"{year}-{i}", name=f"Owner {i}") for i in range(games * 2)]
+    db.session.add_all(owners)
+    db.session.flush()
+    teams = [
+        Team(year=year, espn_team_id=i + 1, owner_id=owner.id, name=f"Team {i}")
+        for i, owner in enumerate(owners)
+    ]
+    db.session.add_all(teams)
+    db.session.flush()
+
+    for i in range(games):
+        round_number = i % 3 + 1
+        db.session.add(
+            Game(
+                year=year,
+                week=14 + round_number,
+                round=round_number,
+                team1_id=teams[2 * i].id,
+                team1_seed=7 + i,
+                team2_id=teams[2 * i + 1].id,
+                team2_seed=8 + i,
+                status="Scheduled",
+            )
+        )
+    for week in (15, 16, 17):
+        db.session.add(
+            Schedule(
+                year=year,
+                week=week,
+                week_start=datetime(year, 12, week - 3, 0, 1),
+                early_game_date_time=datetime(year, 12, week - 2, 20, 15),
+                late_game_date_time=datetime(year, 12, week + 1, 20, 15),
+            )
+        )
+    db.session.commit()
+
+
+def test_load_bracket_query_count_does_not_grow_with_games(app, count_queries):
+    seed_bracket(2022, games=4)
+    seed_bracket(2023, games=12)
+    db.session.expire_all()
+
+    with count_queries() as small:
+        small_bracket = load_bracket(2022, db, Game, Schedule, Tournament)
+    db.session.expire_all()
+    with count_queries() as large:
+        large_bracket = load_bracket(2023, db, Game, Schedule, Tournament)
+
+    assert sum(len(r["games"]) for r in small_bracket["rounds"]) == 4
+    assert sum(len(r["games"]) for r in large_bracket["rounds"]) == 12
+    assert all(
+        game["team2_name"] != "TBD"
+        for round_data in large_bracket["rounds"]
+        for game in round_data["games"]
+    )
+    assert small.count == large.count
+
+
+def test_bulk_upsert_inserts_updates_and_leaves_unchanged_rows(app):
+    db.session.add_all(
+        [Owner(espn_id="a", name="Alice"), Owner(espn_id="b", name="Bob")]
+    )
+    db.session.commit()
+
+    result = bulk_upsert(
+        db,
+        Owner,
+        [
+            {"espn_id": "a", "name": "Alice"},
+            {"espn_id": "b", "name": "Robert"},
+            {"espn_id": "c", "name": "Carol"},
+        ],
+        key=("espn_id",),
+        update=("name",),
+    )
+    db.session.commit()
+
+    assert [owner.espn_id for owner in result["inserted"]] == ["c"]
+    assert [owner.espn_id for owner in result["updated"]] == ["b"]
+    assert [owner.espn_id for owner in result["existing"]] == ["a"]
+    assert {owner.espn_id: owner.name for owner in Owner.query} == {
+        "a": "Alice",
+        "b": "Robert",
+        "c": "Carol",
+    }
+
+
+def test_bulk_upsert_only_inserts_without_update_columns(app):
+    db.session.add(Owner(espn_id="a", name="Alice"))
+    db.session.commit()
+
+    result = bulk_upsert(
+        db,
+        Owner,
+        [{"espn_id": "a", "name": "Renamed"}, {"espn_id": "b", "name": "Bob"}],
+        key=("espn_id",),
+    )
+    db.session.commit()
+
+    assert [owner.espn_id for owner in result["inserted"]] == ["b"]
+    assert result["updated"] == []
+    assert db.session.query(Owner.name).filter_by(espn_id="a").scalar() == "Alice"
+
+
+def test_bulk_upsert_keeps_the_first_of_duplicate_keys(app):
+    result = bulk_upsert(
+        db,
+        Owner,
+        [
+            {"espn_id": "a", "name": "First"},
+            {"espn_id": "a", "name": "Second"},
+        ],
+        key=("espn_id",),
+        update=("name",),
+    )
+    db.session.commit()
+
+    assert len(result["inserted"]) == 1
+    assert [(owner.espn_id, owner.name) for owner in Owner.query] == [("a", "First")]
+
+
+def test_bulk_upsert_matches_composite_keys_across_batches(app):
+    owners = [Owner(espn_id=str(i), name=f"Owner {i}") for i in range(4)]
+    db.session.add_all(owners)
+    db.session.flush()
+    db.session.add_all(
+        Team(year=2023, espn_team_id=i, owner_id=owner.id, name=f"Team {i}")
+        for i, owner in enumerate(owners[:2])
+    )
+    db.session.commit()
+    rows = [
+        {"year": year, "espn_team_id": i, "owner_id": owner.id, "name": f"New {i}"}
+        for year in (2023, 2024)
+        for i, owner in enumerate(owners)
+    ]
+
+    result = bulk_upsert(
+        db, Team, rows, key=("owner_id", "year"), update=("name",), batch_size=3
+    )
+    db.session.commit()
+
+    assert [(team.year, team.espn_team_id) for team in result["updated"]] == [
+        (2023, 0),
+        (2023, 1),
+    ]
+    assert len(result["inserted"]) == 6
+    assert Team.query.count() == 8
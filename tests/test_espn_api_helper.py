@@ -0,0 +1,179 @@
+from types import SimpleNamespace
+from helpers.bracket_helper import add_bracket_games, bracket_seeds, build_bracket
+from helpers.espn_api_helper import ESPNAPIHelper
+from helpers.espn_slim_helper import SlimBoxScore, SlimPlayer
+from models import db, Game, Owner, Team, Tournament
+
+YEAR = 2023
+
+
+def seed_season(league_size=12, missing=()):
+    """
+    Populate a season the way populate_tournament does, with team ids, ESPN team
+    ids and standings ranks all equal. Teams in missing are left out of the Team
+    table, so their games can't be created.
+    """
+    owners = [Owner(espn_id=str(rank), name=f"Owner {rank}") for rank in range(league_size)]
+    db.session.add_all(owners)
+    db.session.flush()
+    db.session.add_all(
+        Team(id=rank, year=YEAR, espn_team_id=rank, owner_id=owner.id, name=f"Team {rank}")
+        for rank, owner in enumerate(owners, 1)
+        if rank not in missing
+    )
+    bracket = build_bracket(league_size)
+    db.session.add(
+        Tournament(
+            year=YEAR,
+            league_size=league_size,
+            bracket_size=bracket["bracket_size"],
+            final_week=bracket["final_week"],
+        )
+    )
+    add_bracket_games(
+        db.session,
+        Game,
+        Team,
+        YEAR,
+        bracket,
+        {seed: f"Team {seed}" for seed in bracket_seeds(bracket)},
+    )
+    db.session.commit()
+
+
+def fake_league(league_size, nfl_week, box_scores):
+    """
+    Stand-in for an ESPN league: its teams, the current NFL week, and box scores
+    by week as {ESPN team id: score}.
+    """
+    return SimpleNamespace(
+        league_id=1,
+        nfl_week=nfl_week,
+        teams=[
+            SimpleNamespace(team_id=rank, team_name=f"Team {rank}")
+            for rank in range(1, league_size + 1)
+        ],
+        box_scores_by_week=box_scores,
+    )
+
+
+def helper_for(league):
+    helper = ESPNAPIHelper(YEAR)
+    for week, scores in league.box_scores_by_week.items():
+        helper.box_score_indexes[(league.league_id, week)] = {
+            team_id: (score, [], 0) for team_id, score in scores.items()
+        }
+    return helper
+
+
+def round_games(round_number):
+    return Game.query.filter_by(year=YEAR, round=round_number).order_by(Game.id).all()
+
+
+def test_advance_bracket_keeps_the_stored_shape_with_a_team_missing(app):
+    # Seed 12's round 2 game can't be created, and the season has 11 teams
+    seed_season(missing=(12,))
+    for game in round_games(1):
+        game.team1_score, game.team2_score, game.status = 100, 90, "Completed"
+    db.session.commit()
+
+    ESPNAPIHelper(YEAR).advance_bracket()
+    db.session.commit()
+
+    assert [(game.team1_seed, game.team2_seed) for game in round_games(2)] == [(11, 10)]
+
+
+def test_update_game_results_keeps_scores_when_the_bracket_does_not_fit(app):
+    seed_season()
+    # A shape that doesn't match the stored games
+    db.session.get(Tournament, YEAR).league_size = 16
+    db.session.commit()
+    league = fake_league(12, 16, {15: {7: 100, 10: 90, 8: 80, 9: 95}})
+
+    assert helper_for(league).update_game_results(league, 15)
+
+    assert [
+        (game.team1_score, game.team2_score, game.status) for game in round_games(1)
+    ] == [(100, 90, "Completed"), (80, 95, "Completed")]
+    assert all(game.team2_id is None for game in round_games(2))
+
+
+def test_ties_are_broken_on_the_points_of_the_whole_lineup(app):
+    seed_season()
+    league = fake_league(12, 16, {})
+    teams = {team.team_id: team for team in league.teams}
+    # Both score 100, but team 10's starters and bench outscore team 7's
+    lineups = {
+        7: [SlimPlayer(60, None), SlimPlayer(40, None), SlimPlayer(5, "BE")],
+        10: [SlimPlayer(70, None), SlimPlayer(30.4, None), SlimPlayer(9, "IR")],
+    }
+    league.box_scores = lambda week: [
+        SlimBoxScore(teams[7], 100, lineups[7], teams[10], 100, lineups[10])
+    ]
+    helper = ESPNAPIHelper(YEAR)
+
+    assert helper.get_total_team_score(league, 7, 15) == 105
+    assert helper.get_total_team_score(league, 10, 15) == 109.4
+
+    helper.update_game_results(league, 15)
+
+    game = round_games(1)[0]
+    assert (game.team1_seed, game.team1_score, game.team2_score) == (7, 105, 109)
+
+
+def spy_on_weeks(helper):
+    """
+    Record the weeks whose results the helper writes.
+    """
+    weeks = []
+    update_game_results = helper.update_game_results
+
+    def record(league, week, commit=True):
+        weeks.append(week)
+        return update_game_results(league, week, commit=commit)
+
+    helper.update_game_results = record
+    return weeks
+
+
+def test_update_results_skips_weeks_whose_box_scores_have_not_changed(app):
+    seed_season()
+    fingerprints = {}
+    league = fake_league(12, 15, {15: {7: 100, 10: 90, 8: 80, 9: 95}})
+    helper = helper_for(league)
+    written = spy_on_weeks(helper)
+
+    assert helper.update_results(league, [15], fingerprints=fingerprints)
+    assert written == [15]
+    assert (YEAR, 15) in fingerprints
+
+    # The same box scores on the next poll
+    helper = helper_for(league)
+    written = spy_on_weeks(helper)
+    assert not helper.update_results(league, [15], fingerprints=fingerprints)
+    assert written == []
+
+    # A score moved
+    league.box_scores_by_week[15][7] = 110
+    helper = helper_for(league)
+    written = spy_on_weeks(helper)
+    assert helper.update_results(league, [15], fingerprints=fingerprints)
+    assert written == [15]
+    assert round_games(1)[0].team1_score == 110
+
+
+def test_update_results_rechecks_weeks_after_the_season_changes(app):
+    seed_season()
+    fingerprints = {}
+    league = fake_league(12, 15, {15: {7: 100, 10: 90, 8: 80, 9: 95}})
+    helper_for(league).update_results(league, [15], fingerprints=fingerprints)
+
+    # A score edited outside the poll bumps the season version
+    round_games(1)[0].team1_score = 0
+    db.session.commit()
+
+    helper = helper_for(league)
+    written = spy_on_weeks(helper)
+    assert helper.update_results(league, [15], fingerprints=fingerprints)
+    assert written == [15]
+    assert round_games(1)[0].team1_score == 100
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from helpers.lease_helper import acquire_lease, release_lease
+from models import db, SchedulerLease
+
+
+def expire(name):
+    db.session.get(SchedulerLease, name).expires_at = datetime.utcnow() - timedelta(
+        seconds=1
+    )
+    db.session.commit()
+
+
+def test_only_one_holder_gets_the_lease(app):
+    assert acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+    assert not acquire_lease("scheduler", "b", 90, db, SchedulerLease)
+    # The holder keeps renewing it
+    assert acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+    assert not acquire_lease("scheduler", "b", 90, db, SchedulerLease)
+
+    assert db.session.get(SchedulerLease, "scheduler").holder == "a"
+
+
+def test_renewing_keeps_the_acquired_time(app):
+    acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+    lease = db.session.get(SchedulerLease, "scheduler")
+    acquired_at, expires_at = lease.acquired_at, lease.expires_at
+
+    acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+    db.session.refresh(lease)
+
+    assert lease.acquired_at == acquired_at
+    assert lease.expires_at >= expires_at
+
+
+def test_an_expired_lease_is_taken_over(app):
+    acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+    expire("scheduler")
+
+    assert acquire_lease("scheduler", "b", 90, db, SchedulerLease)
+    assert not acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+
+    lease = db.session.get(SchedulerLease, "scheduler")
+    db.session.refresh(lease)
+    assert lease.holder == "b"
+    assert lease.expires_at > datetime.utcnow()
+
+
+def test_a_released_lease_is_taken_over_straight_away(app):
+    acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+    release_lease("scheduler", "a", db, SchedulerLease)
+
+    assert acquire_lease("scheduler", "b", 90, db, SchedulerLease)
+
+
+def test_leases_are_independent(app):
+    assert acquire_lease("scheduler", "a", 90, db, SchedulerLease)
+    assert acquire_lease("importer", "b", 90, db, SchedulerLease)
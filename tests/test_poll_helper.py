@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from helpers.poll_helper import due_weeks, next_poll_interval
+
+CONFIG = {
+    "SCHEDULER_LIVE_INTERVAL": 60,
+    "SCHEDULER_MAX_INTERVAL": 30 * 60,
+    "SCHEDULER_FINAL_INTERVAL": 60 * 60,
+    "SCHEDULER_IDLE_INTERVAL": 24 * 60 * 60,
+    "SCHEDULER_GAME_LENGTH": 4 * 60 * 60,
+}
+
+
+def week(number, early, late, games=2, completed=False):
+    return {
+        "week": number,
+        "early": early,
+        "late": late,
+        "games": games,
+        "completed": completed,
+    }
+
+
+# Week 15 runs Thursday night to Monday night, week 16 starts the Thursday after
+WEEKS = [
+    week(15, datetime(2023, 12, 14, 20), datetime(2023, 12, 18, 20)),
+    week(16, datetime(2023, 12, 21, 20), datetime(2023, 12, 25, 20)),
+]
+
+
+def test_due_weeks_are_the_started_weeks_with_games_left():
+    weeks = WEEKS + [
+        week(14, datetime(2023, 12, 7, 20), datetime(2023, 12, 11, 20), completed=True),
+        week(13, datetime(2023, 11, 30, 20), datetime(2023, 12, 4, 20), games=0),
+    ]
+
+    assert due_weeks(datetime(2023, 12, 10), weeks) == []
+    assert due_weeks(datetime(2023, 12, 16), weeks) == [15]
+    # A week stays due until ESPN has made all of its games final
+    assert due_weeks(datetime(2023, 12, 22), weeks) == [15, 16]
+
+
+def test_polls_every_live_interval_while_scores_move():
+    now = datetime(2023, 12, 17, 13)
+
+    assert next_poll_interval(now, WEEKS, True, None, CONFIG) == (
+        timedelta(seconds=60),
+        True,
+    )
+    assert next_poll_interval(now, WEEKS, True, timedelta(minutes=8), CONFIG) == (
+        timedelta(seconds=60),
+        True,
+    )
+
+
+def test_backs_off_up_to_the_max_interval_while_scores_do_not_move():
+    now = datetime(2023, 12, 17, 13)
+
+    assert next_poll_interval(now, WEEKS, False, timedelta(minutes=1), CONFIG) == (
+        timedelta(minutes=2),
+        True,
+    )
+    assert next_poll_interval(now, WEEKS, False, timedelta(minutes=20), CONFIG) == (
+        timedelta(minutes=30),
+        True,
+    )
+
+
+def test_played_out_weeks_are_checked_every_final_interval():
+    # Week 15 is over but not final, and week 16 kicks off in three days
+    now = datetime(2023, 12, 19, 12)
+
+    assert next_poll_interval(now, WEEKS, False, None, CONFIG) == (
+        timedelta(hours=1),
+        False,
+    )
+
+
+def test_waits_exactly_for_the_next_kickoff():
+    now = datetime(2023, 12, 14, 19, 30)
+
+    assert next_poll_interval(now, WEEKS, False, None, CONFIG) == (
+        timedelta(minutes=30),
+        False,
+    )
+
+
+def test_idles_once_every_week_is_completed():
+    weeks = [dict(w, completed=True) for w in WEEKS]
+
+    assert next_poll_interval(datetime(2023, 12, 17, 13), weeks, False, None, CONFIG) == (
+        timedelta(days=1),
+        False,
+    )
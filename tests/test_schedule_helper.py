@@ -0,0 +1,27 @@
+import os
+from datetime import datetime
+from helpers.schedule_helper import parse_schedule_page, schedule_weeks
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def test_parse_schedule_page_reads_linked_cells():
+    columns = parse_schedule_page(os.path.join(FIXTURES, "games-2023.htm"))
+
+    # Repeated header rows and playoff rounds are skipped
+    assert columns == {
+        "week": [15, 15, 15, 16, 16],
+        "date": ["2023-12-14", "2023-12-17", "2023-12-18", "2023-12-21", "2023-12-25"],
+        "time": ["8:15PM", "1:00PM", "8:15PM", "8:15PM", "8:15PM"],
+    }
+
+
+def test_schedule_weeks_from_page():
+    columns = parse_schedule_page(os.path.join(FIXTURES, "games-2023.htm"))
+    weeks = schedule_weeks(columns, (15, 16, 17)).to_dict("records")
+
+    assert [week["week"] for week in weeks] == [15, 16]
+    assert weeks[0]["early"] == datetime(2023, 12, 14, 20, 15)
+    assert weeks[0]["late"] == datetime(2023, 12, 18, 20, 15)
+    assert weeks[0]["week_start"] == datetime(2023, 12, 12, 0, 1)
+    assert weeks[1]["week_start"] == datetime(2023, 12, 19, 0, 1)